@@ -2,7 +2,7 @@ from flask import Flask
 from api import routes
 from api.utils.filters import register_filters
 from api.utils.analytics import analytics_db
-from api.utils.documents import get_all_documents
+from api.utils.documents import refresh_documents
 import os
 import threading
 import time
@@ -18,6 +18,10 @@ def create_app():
 
     routes.register_blueprints(app)
 
+    @app.before_request
+    def start_background_jobs():
+        analytics_db.start_compaction()
+
     def init_with_retry():
         max_retries = 3
         for attempt in range(max_retries):
@@ -27,8 +31,7 @@ def create_app():
 
                 time.sleep(0.5)
 
-                get_all_documents.cache_clear()
-                docs = get_all_documents()
+                docs = refresh_documents(full=True)
                 logger.info(f"Successfully loaded {len(docs)} documents")
 
                 doc_names = [doc['filename'] for doc in docs[:5]]
@@ -45,6 +48,10 @@ def create_app():
     init_thread = threading.Thread(target=init_with_retry)
     init_thread.daemon = True
     init_thread.start()
+    # Joined by callers that fork, like the static build: a fork while the
+    # catalog rescan holds the document index lock leaves the children
+    # waiting on it forever.
+    app.init_thread = init_thread
 
     return app
 
@@ -0,0 +1,236 @@
+import os
+import sys
+import json
+import gzip
+import shutil
+import hashlib
+import argparse
+import logging
+import urllib.parse
+from datetime import datetime
+from api.app import app
+from api.config import BUILD_DIR, DOCS_DIR, SITE_CONFIG
+from api.routes.docs import render_markdown_document
+from api.utils.documents import get_all_documents, get_catalog_version, get_catalog_titles
+from api.utils.dependency_graph import DependencyGraph, diff_catalogs, get_document_dependencies
+from api.utils.markdown import RENDER_FINGERPRINT
+from api.utils.prerendered import MANIFEST_NAME, PRERENDERED_VARIANTS, ENCODING_SUFFIXES, get_history_inputs
+from api.utils.bulk_render import render_documents, warm_render_cache, summarize_timings
+from api.utils.recent_updates import recent_updates
+from api.utils.github_client import github_client
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def write_variant(output_dir, relative_path, html):
+    data = html.encode('utf-8')
+    path = os.path.join(output_dir, relative_path)
+    write_file(path, data)
+
+    encodings = ['gzip']
+    write_file(f"{path}{ENCODING_SUFFIXES['gzip']}", gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        write_file(f"{path}{ENCODING_SUFFIXES['br']}", brotli.compress(data, quality=11))
+        encodings.append('br')
+    return encodings
+
+def get_markdown_documents():
+    documents = []
+    for doc in get_all_documents():
+        if doc.get('is_virtual'):
+            continue
+        md_path = os.path.join(DOCS_DIR, *doc['filename'].split('/')) + '.md'
+        if os.path.exists(md_path):
+            documents.append((doc['filename'], md_path))
+    return sorted(documents)
+
+def render_document_pages(template_name, md_content):
+    pages = {}
+    url = '/' + urllib.parse.quote(template_name)
+    for variant in PRERENDERED_VARIANTS:
+        query = '?print=1' if variant == 'print' else ''
+        with app.test_request_context(f"{url}{query}", base_url=SITE_CONFIG['base_url']):
+            pages[variant] = render_markdown_document(template_name, md_content, is_print=(variant == 'print'), prerendered=True)
+    return pages
+
+def log_timings(results):
+    for name, seconds in summarize_timings(results):
+        logger.info(f"  {seconds * 1000:8.1f} ms  {name}")
+
+def get_build_fingerprint():
+    digest = hashlib.sha256(RENDER_FINGERPRINT.encode('utf-8'))
+    for template in ('markdown_base.html', 'print.html'):
+        with open(os.path.join(app.root_path, app.template_folder, template), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def read_sources():
+    sources = {}
+    for template_name, md_path in get_markdown_documents():
+        stat = os.stat(md_path)
+        with open(md_path, 'rb') as f:
+            sources[template_name] = (md_path, stat, f.read())
+    return sources
+
+def remove_document_files(output_dir, entry):
+    for relative_path in entry.get('files', {}).values():
+        for suffix in [''] + list(ENCODING_SUFFIXES.values()):
+            path = os.path.join(output_dir, relative_path) + suffix
+            if os.path.exists(path):
+                os.remove(path)
+
+# Returns {template_name: reason} for every document that has to be rendered
+# again. A document is reused when its source is unchanged and nothing it
+# depends on in the catalog or in the history changed since the previous build.
+def plan_build(output_dir, previous, sources):
+    if previous is None:
+        return {template_name: 'new' for template_name in sources}
+    if previous.get('build_fingerprint') != get_build_fingerprint():
+        return {template_name: 'renderer' for template_name in sources}
+
+    changes = diff_catalogs(previous.get('catalog', {}), get_catalog_titles())
+    affected = DependencyGraph.from_manifest(previous).affected_by(changes)
+
+    stale = {}
+    for template_name, (md_path, stat, source) in sources.items():
+        entry = previous['documents'].get(template_name)
+        if entry is None:
+            stale[template_name] = 'new'
+        elif entry['sha256'] != hashlib.sha256(source).hexdigest():
+            stale[template_name] = 'changed'
+        elif template_name in affected:
+            stale[template_name] = 'dependency'
+        elif entry.get('history') != get_history_inputs(template_name):
+            stale[template_name] = 'history'
+        elif not all(os.path.exists(os.path.join(output_dir, path)) for path in entry['files'].values()):
+            stale[template_name] = 'missing'
+    return stale
+
+def build_site(output_dir=BUILD_DIR, jobs=None, full=False):
+    previous = None if full else load_manifest(output_dir)
+    pages_dir = os.path.join(output_dir, 'pages')
+    if previous is None and os.path.exists(pages_dir):
+        shutil.rmtree(pages_dir)
+
+    sources = read_sources()
+    recent_updates.refresh(get_all_documents())
+    stale = plan_build(output_dir, previous, sources)
+
+    manifest = {
+        'built_at': datetime.now().isoformat(),
+        'build_fingerprint': get_build_fingerprint(),
+        'catalog_version': get_catalog_version(),
+        'catalog': get_catalog_titles(),
+        'documents': {}
+    }
+
+    # Markdown rendering is spread over worker processes and lands in the render
+    # cache, so the template pass below only assembles pages.
+    results = render_documents([(name, sources[name][2].decode('utf-8')) for name in stale], jobs=jobs)
+    log_timings(results)
+
+    for template_name in sorted(sources):
+        md_path, stat, source = sources[template_name]
+
+        if template_name not in stale:
+            entry = dict(previous['documents'][template_name], mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            manifest['documents'][template_name] = entry
+            continue
+
+        md_content = source.decode('utf-8')
+        pages = render_document_pages(template_name, md_content)
+
+        entry = {
+            'source': os.path.relpath(md_path, DOCS_DIR),
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': hashlib.sha256(source).hexdigest(),
+            'dependencies': sorted(get_document_dependencies(template_name, md_content)),
+            'history': get_history_inputs(template_name),
+            'files': {},
+            'encodings': []
+        }
+        for variant, html in pages.items():
+            relative_path = os.path.join('pages', *template_name.split('/')) + PRERENDERED_VARIANTS[variant]
+            entry['encodings'] = write_variant(output_dir, relative_path, html)
+            entry['files'][variant] = relative_path
+
+        manifest['documents'][template_name] = entry
+        logger.info(f"Prerendered {template_name} ({stale[template_name]})")
+
+    if previous is not None:
+        for template_name, entry in previous.get('documents', {}).items():
+            if template_name not in sources:
+                remove_document_files(output_dir, entry)
+                logger.info(f"Removed {template_name}")
+
+    write_file(os.path.join(output_dir, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    logger.info(f"Prerendered {len(stale)} of {len(manifest['documents'])} documents into {output_dir}")
+    return manifest
+
+def report_stale(output_dir=BUILD_DIR):
+    previous = load_manifest(output_dir)
+    sources = read_sources()
+    recent_updates.refresh(get_all_documents())
+    stale = plan_build(output_dir, previous, sources)
+
+    for template_name in sorted(stale):
+        print(f"{stale[template_name]:<10} {template_name}")
+    if previous is not None:
+        for template_name in sorted(set(previous.get('documents', {})) - set(sources)):
+            print(f"{'removed':<10} {template_name}")
+    return stale
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Prerender the documentation tree to static HTML.')
+    parser.add_argument('--output', default=BUILD_DIR, help='output directory (default: %(default)s)')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='worker processes for markdown rendering (default: %(default)s)')
+    parser.add_argument('--cache-only', action='store_true', help='only warm the render cache, do not write pages')
+    parser.add_argument('--full', action='store_true', help='render every document instead of only the stale ones')
+    parser.add_argument('--stale', action='store_true', help='list the documents the next build would render and exit')
+    args = parser.parse_args(argv)
+
+    # History is only fetched when pages are written, and then up front,
+    # never from a thread running while worker processes are forked. Pages
+    # written once should carry full history, so renders get no time budget.
+    recent_updates.background = False
+    github_client.render_budget = 0
+
+    # Rendering forks worker processes, which must not inherit the app's
+    # startup thread in the middle of the catalog scan.
+    app.init_thread.join()
+
+    if args.stale:
+        report_stale(args.output)
+        return 0
+
+    if args.cache_only:
+        log_timings(warm_render_cache(jobs=args.jobs))
+        return 0
+
+    if brotli is None:
+        logger.warning("brotli is not installed - only gzip variants will be written")
+
+    build_site(args.output, jobs=args.jobs, full=args.full)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
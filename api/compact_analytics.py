@@ -0,0 +1,23 @@
+import sys
+import argparse
+import logging
+from api.config import ANALYTICS_CONFIG
+from api.utils.analytics import analytics_db
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Roll raw page-view logs up into the hourly and daily tables and delete old ones.')
+    parser.add_argument('--retention-days', type=int, default=ANALYTICS_CONFIG['log_retention_days'], help='days of raw logs to keep (default: %(default)s, negative keeps everything)')
+    parser.add_argument('--batch-size', type=int, default=ANALYTICS_CONFIG['compact_batch_size'], help='log rows deleted per transaction (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    analytics_db.init_db()
+    result = analytics_db.compact_logs(args.retention_days, args.batch_size)
+    if result is None:
+        logging.error("Analytics database unavailable")
+        return 1
+    print(f"Rolled up {result['days_rolled_up']} days, deleted {result['logs_deleted']} log rows, rolled up until {result['rolled_up_until']}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
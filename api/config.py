@@ -1,10 +1,12 @@
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
 
 GITHUB_REPO = "Meekiavelique/mdoc"
 DOCS_DIR = os.path.join(os.path.dirname(__file__), 'templates', 'docs')
+BUILD_DIR = os.getenv('BUILD_DIR', os.path.join(os.path.dirname(__file__), 'prerendered'))
 
 DATABASE_CONFIG = {
     'type': os.getenv('DB_TYPE', 'sqlite'),
@@ -13,11 +15,99 @@ DATABASE_CONFIG = {
     'database': os.getenv('DB_NAME', 'mdoc_analytics'),
     'username': os.getenv('DB_USER', 'mdoc_user'),
     'password': os.getenv('DB_PASSWORD', ''),
-    'path': os.getenv('DB_PATH', os.path.join(os.path.dirname(__file__), 'data', 'analytics.db'))
+    'path': os.getenv('DB_PATH', os.path.join(os.path.dirname(__file__), 'data', 'analytics.db')),
+    'busy_timeout': float(os.getenv('DB_BUSY_TIMEOUT', 30))
 }
 
+# Analytics connections are reused across requests. Timeouts are in seconds:
+# how long a request waits for a free connection, how long one may sit idle or
+# live in total, and how long it can be idle before it is re-checked on checkout.
+POOL_CONFIG = {
+    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 5)),
+    'idle_timeout': float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300)),
+    'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', 3600)),
+    'check_after': float(os.getenv('DB_POOL_CHECK_AFTER', 30))
+}
+
+# With write_behind, page views are buffered in memory and written in one
+# transaction every flush_interval_ms or flush_events views, whichever comes
+# first. Off on Vercel, where a frozen function would never flush.
+# Raw view logs are rolled up into hourly and daily tables and deleted once
+# older than log_retention_days, compact_batch_size rows per transaction, every
+# compact_interval seconds (0 disables the background job; run
+# python -m api.compact_analytics instead).
+ANALYTICS_CONFIG = {
+    'write_behind': os.getenv('ANALYTICS_WRITE_BEHIND', '0' if os.getenv('VERCEL') == '1' else '1') == '1',
+    'flush_interval_ms': int(os.getenv('ANALYTICS_FLUSH_INTERVAL_MS', 1000)),
+    'flush_events': int(os.getenv('ANALYTICS_FLUSH_EVENTS', 500)),
+    'log_retention_days': int(os.getenv('ANALYTICS_LOG_RETENTION_DAYS', 30)),
+    'compact_interval': float(os.getenv('ANALYTICS_COMPACT_INTERVAL', 0 if os.getenv('VERCEL') == '1' else 3600)),
+    'compact_batch_size': int(os.getenv('ANALYTICS_COMPACT_BATCH_SIZE', 5000))
+}
+
+# poll_interval is in seconds; a negative value disables change detection
+# (deployments where the docs never change on disk, like Vercel).
+# history_interval is how often, in seconds, the recently-updated flags are
+# recomputed from document history in the background.
+CATALOG_CONFIG = {
+    'poll_interval': float(os.getenv('CATALOG_POLL_INTERVAL', -1 if os.getenv('VERCEL') == '1' else 2)),
+    'inotify': os.getenv('CATALOG_INOTIFY', '1') == '1',
+    'manifest': os.getenv('CATALOG_MANIFEST', os.path.join(os.path.dirname(__file__), 'data', 'catalog_manifest.json')),
+    'history_interval': float(os.getenv('CATALOG_HISTORY_INTERVAL', 3600))
+}
+
+# provider is 'auto' (local git history when a full clone is present, GitHub
+# otherwise), 'git' (local only, never calls GitHub) or 'github'.
+HISTORY_CONFIG = {
+    'provider': os.getenv('HISTORY_PROVIDER', 'auto'),
+    'repo_dir': os.getenv('HISTORY_REPO_DIR', os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'retry_after': float(os.getenv('HISTORY_RETRY_AFTER', 300))
+}
+
+# ttl is in seconds; entries past max_bytes are evicted oldest first.
+GITHUB_CACHE_CONFIG = {
+    'path': os.getenv('GITHUB_CACHE_PATH', os.path.join(os.path.dirname(__file__), 'data', 'github_cache.db')),
+    'max_bytes': int(os.getenv('GITHUB_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    'ttl': int(os.getenv('GITHUB_CACHE_TTL', 6 * 60 * 60)),
+    'front_size': int(os.getenv('GITHUB_CACHE_FRONT_SIZE', 256))
+}
+
+# Times are in seconds. render_budget caps the time a page render may spend
+# on GitHub history lookups in total; 0 disables the cap.
+GITHUB_CLIENT_CONFIG = {
+    'timeout': float(os.getenv('GITHUB_TIMEOUT', 10)),
+    'max_concurrency': int(os.getenv('GITHUB_MAX_CONCURRENCY', 4)),
+    'pool_size': int(os.getenv('GITHUB_POOL_SIZE', 8)),
+    'failure_threshold': int(os.getenv('GITHUB_FAILURE_THRESHOLD', 3)),
+    'cooldown': float(os.getenv('GITHUB_COOLDOWN', 60)),
+    'render_budget': float(os.getenv('GITHUB_RENDER_BUDGET', 2))
+}
+
+# disk_max_bytes bounds the on-disk copy; least recently used files go first.
+RENDER_CACHE_CONFIG = {
+    'max_bytes': int(os.getenv('RENDER_CACHE_MAX_BYTES', 32 * 1024 * 1024)),
+    'disk': os.getenv('RENDER_CACHE_DISK', '0' if os.getenv('VERCEL') == '1' else '1') == '1',
+    'disk_max_bytes': int(os.getenv('RENDER_CACHE_DISK_MAX_BYTES', 256 * 1024 * 1024)),
+    'path': os.getenv('RENDER_CACHE_PATH', os.path.join(os.path.dirname(__file__), 'data', 'render_cache'))
+}
+
+HIGHLIGHT_CACHE_CONFIG = {
+    'max_bytes': int(os.getenv('HIGHLIGHT_CACHE_MAX_BYTES', 16 * 1024 * 1024)),
+    'disk': RENDER_CACHE_CONFIG['disk'],
+    'disk_max_bytes': int(os.getenv('HIGHLIGHT_CACHE_DISK_MAX_BYTES', 128 * 1024 * 1024)),
+    'path': os.getenv('HIGHLIGHT_CACHE_PATH', os.path.join(os.path.dirname(__file__), 'data', 'highlight_cache'))
+}
+
+# Extra names [[references]] may use, mapped to document filenames,
+# e.g. {"shaders": "Minecraft Vanilla Shaders/1_Getting_started"}
+CROSS_REFERENCE_ALIASES = json.loads(os.getenv('CROSS_REFERENCE_ALIASES', '{}'))
+
 DISCORD_WEBHOOK_URL = os.getenv('DISCORD_WEBHOOK_URL', '')
 
+# /api/cache/stats answers in debug mode, or to 'Authorization: Bearer <STATS_TOKEN>'.
+STATS_TOKEN = os.getenv('STATS_TOKEN', '')
+
 SITE_CONFIG = {
     'title': os.getenv('SITE_TITLE', 'Mdoc'),
     'description': os.getenv('SITE_DESCRIPTION', 'Documentation System'),
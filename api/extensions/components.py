@@ -0,0 +1,126 @@
+from markdown.preprocessors import Preprocessor
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ComponentBlock:
+    # Whether the body may contain its own fenced code blocks. The closing
+    # fence of such a block then belongs to the code, not to the component.
+    nested_fences = False
+
+    def match_header(self, stripped):
+        return None
+
+    def match_inline(self, stripped):
+        return None
+
+    def open(self, match, previous=None):
+        return match
+
+    def render(self, header, body, index):
+        raise NotImplementedError
+
+    def render_inline(self, match, index):
+        raise NotImplementedError
+
+    def render_unclosed(self, header, body, index):
+        return None
+
+class _OpenBlock:
+    __slots__ = ('component', 'rank', 'header', 'body', 'in_fence')
+
+    def __init__(self, component, rank, header):
+        self.component = component
+        self.rank = rank
+        self.header = header
+        self.body = []
+        self.in_fence = False
+
+class ComponentPreprocessor(Preprocessor):
+    def __init__(self, md=None):
+        super().__init__(md)
+        self._registered = []
+        self._components = []
+
+    def register(self, component, priority):
+        self._registered.append((priority, len(self._registered), component))
+        self._components = [component for _, _, component in sorted(self._registered, key=lambda item: (-item[0], item[1]))]
+
+    # Components are ranked by priority. A block only recognizes headers of
+    # components ranked above it (which become nested blocks) or its own header
+    # (which restarts it); everything else is body. This reproduces what running
+    # one preprocessor per component in priority order used to produce.
+    def run(self, lines):
+        new_lines = []
+        stack = []
+        counters = [0] * len(self._components)
+
+        def emit(text):
+            if stack:
+                stack[-1].body.append(text)
+            else:
+                new_lines.append(text)
+
+        for line in lines:
+            stripped = line.strip()
+            current = stack[-1] if stack else None
+
+            if current is not None and current.in_fence:
+                if stripped == '```':
+                    current.in_fence = False
+                emit(line)
+                continue
+
+            if stripped.startswith('```'):
+                if current is not None and stripped == '```':
+                    stack.pop()
+                    emit(current.component.render(current.header, current.body, counters[current.rank]))
+                    counters[current.rank] += 1
+                    continue
+
+                opened = False
+                for rank, component in enumerate(self._components):
+                    if current is not None and rank > current.rank:
+                        break
+                    match = component.match_header(stripped)
+                    if match:
+                        if current is not None and rank == current.rank:
+                            current.header = component.open(match, current.header)
+                            current.body = []
+                        else:
+                            stack.append(_OpenBlock(component, rank, component.open(match)))
+                        opened = True
+                        break
+                if opened:
+                    continue
+                if current is not None and current.component.nested_fences:
+                    current.in_fence = True
+
+            elif stripped.startswith('!['):
+                handled = False
+                for rank, component in enumerate(self._components):
+                    if current is not None and rank >= current.rank:
+                        break
+                    match = component.match_inline(stripped)
+                    if match:
+                        emit(component.render_inline(match, counters[rank]))
+                        counters[rank] += 1
+                        handled = True
+                        break
+                if handled:
+                    continue
+
+            emit(line)
+
+        while stack:
+            block = stack.pop()
+            placeholder = block.component.render_unclosed(block.header, block.body, counters[block.rank])
+            if placeholder is not None:
+                emit(placeholder)
+
+        return new_lines
+
+def register_component(md, component, priority):
+    if 'components' not in md.preprocessors:
+        md.preprocessors.register(ComponentPreprocessor(md), 'components', 176)
+    md.preprocessors['components'].register(component, priority)
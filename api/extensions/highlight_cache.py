@@ -0,0 +1,106 @@
+from markdown.extensions import Extension
+from markdown.extensions.attr_list import get_attrs_and_remainder
+from markdown.extensions.codehilite import CodeHilite, CodeHiliteExtension, HiliteTreeprocessor
+from markdown.extensions.fenced_code import FencedBlockPreprocessor
+import markdown
+import pygments
+
+def _settings_key(config):
+    return repr((markdown.__version__, pygments.__version__, sorted((key, repr(value)) for key, value in config.items())))
+
+class CachedFencedBlockPreprocessor(FencedBlockPreprocessor):
+    def __init__(self, md, config, cache):
+        super().__init__(md, config)
+        self.cache = cache
+
+    # Cached fences are swapped for their stored HTML before the stock
+    # preprocessor runs. It then highlights only the remaining fences, storing
+    # one stash entry per fence in document order, which is what gets cached.
+    def run(self, lines):
+        codehilite_conf = {}
+        for ext in self.md.registeredExtensions:
+            if isinstance(ext, CodeHiliteExtension):
+                codehilite_conf = ext.getConfigs()
+        settings = _settings_key(codehilite_conf)
+
+        text = '\n'.join(lines)
+        misses = []
+        index = 0
+        while True:
+            m = self.FENCED_BLOCK_RE.search(text, index)
+            if not m:
+                break
+            if m.group('attrs'):
+                _, remainder = get_attrs_and_remainder(m.group('attrs'))
+                if remainder:
+                    index = m.end('attrs')
+                    continue
+
+            key = self.cache.make_key('fenced', settings, m.group(0))
+            html = self.cache.get(key)
+            if html is None:
+                misses.append(key)
+                index = m.end()
+                continue
+
+            placeholder = self.md.htmlStash.store(html)
+            text = f'{text[:m.start()]}\n{placeholder}\n{text[m.end():]}'
+            index = m.start() + 1 + len(placeholder)
+
+        stashed = len(self.md.htmlStash.rawHtmlBlocks)
+        lines = super().run(text.split('\n'))
+
+        highlighted = self.md.htmlStash.rawHtmlBlocks[stashed:]
+        if len(highlighted) == len(misses):
+            for key, html in zip(misses, highlighted):
+                self.cache.put(key, html)
+        return lines
+
+class CachedHiliteTreeprocessor(HiliteTreeprocessor):
+    def __init__(self, md, config, cache):
+        super().__init__(md)
+        self.config = config
+        self.cache = cache
+
+    def run(self, root):
+        settings = _settings_key(self.config)
+        for block in root.iter('pre'):
+            if len(block) != 1 or block[0].tag != 'code' or block[0].text is None:
+                continue
+
+            code_text = self.code_unescape(block[0].text)
+            key = self.cache.make_key('indented', settings, self.md.tab_length, code_text)
+            html = self.cache.get(key)
+            if html is None:
+                local_config = self.config.copy()
+                html = CodeHilite(
+                    code_text,
+                    tab_length=self.md.tab_length,
+                    style=local_config.pop('pygments_style', 'default'),
+                    **local_config
+                ).hilite()
+                self.cache.put(key, html)
+
+            placeholder = self.md.htmlStash.store(html)
+            block.clear()
+            block.tag = 'p'
+            block.text = placeholder
+
+class HighlightCacheExtension(Extension):
+    def __init__(self, cache, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    # Must be listed after FencedCodeExtension and CodeHiliteExtension, whose
+    # processors it replaces under the same names and priorities.
+    def extendMarkdown(self, md):
+        if 'fenced_code_block' in md.preprocessors:
+            fenced = md.preprocessors['fenced_code_block']
+            md.preprocessors.register(CachedFencedBlockPreprocessor(md, fenced.config, self.cache), 'fenced_code_block', 25)
+        if 'hilite' in md.treeprocessors:
+            hilite = md.treeprocessors['hilite']
+            md.treeprocessors.register(CachedHiliteTreeprocessor(md, hilite.config, self.cache), 'hilite', 30)
+
+def makeExtension(**kwargs):
+    from api.utils.render_cache import highlight_cache
+    return HighlightCacheExtension(highlight_cache, **kwargs)
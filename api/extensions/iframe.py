@@ -1,54 +1,38 @@
 from markdown.extensions import Extension
-from markdown.preprocessors import Preprocessor
+from api.extensions.components import ComponentBlock, register_component
 import re
 import urllib.parse
 
-class IframePreprocessor(Preprocessor):
-    def run(self, lines):
-        new_lines = []
-        in_iframe_block = False
-        iframe_config = {}
-        counter = 0
-        
-        for line in lines:
-            if line.strip() == '```iframe':
-                in_iframe_block = True
-                iframe_config = {}
-                continue
-            elif in_iframe_block and line.strip() == '```':
-                in_iframe_block = False
-                
-                placeholder = self._create_iframe_embed(iframe_config, counter)
-                new_lines.append(placeholder)
-                counter += 1
-                continue
-            elif in_iframe_block:
-                self._parse_config_line(line, iframe_config)
-                continue
-            
-            iframe_match = re.match(r'^!\[iframe\]\(([^)]+)\)(?:\{([^}]+)\})?', line.strip())
-            if iframe_match:
-                url = iframe_match.group(1)
-                options = iframe_match.group(2) or ""
-                
-                config = {'url': url}
-                if options:
-                    for option in options.split(','):
-                        if '=' in option:
-                            key, value = option.strip().split('=', 1)
-                            config[key] = value
-                        else:
-                            config[option.strip()] = True
-                
-                placeholder = self._create_iframe_embed(config, counter)
-                new_lines.append(placeholder)
-                counter += 1
-                continue
-            
-            new_lines.append(line)
-                
-        return new_lines
-    
+class IframeBlock(ComponentBlock):
+    def match_header(self, stripped):
+        return stripped == '```iframe'
+
+    def match_inline(self, stripped):
+        if not stripped.startswith('![iframe]'):
+            return None
+        return re.match(r'^!\[iframe\]\(([^)]+)\)(?:\{([^}]+)\})?', stripped)
+
+    def render(self, header, body, index):
+        config = {}
+        for line in body:
+            self._parse_config_line(line, config)
+        return self._create_iframe_embed(config, index)
+
+    def render_inline(self, match, index):
+        url = match.group(1)
+        options = match.group(2) or ""
+
+        config = {'url': url}
+        if options:
+            for option in options.split(','):
+                if '=' in option:
+                    key, value = option.strip().split('=', 1)
+                    config[key] = value
+                else:
+                    config[option.strip()] = True
+
+        return self._create_iframe_embed(config, index)
+
     def _parse_config_line(self, line, config):
         line = line.strip()
         if '=' in line:
@@ -113,7 +97,7 @@ class IframePreprocessor(Preprocessor):
 
 class IframeExtension(Extension):
     def extendMarkdown(self, md):
-        md.preprocessors.register(IframePreprocessor(md), 'iframe', 171)
+        register_component(md, IframeBlock(), 171)
 
 def makeExtension(**kwargs):
     return IframeExtension(**kwargs)
\ No newline at end of file
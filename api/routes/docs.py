@@ -1,16 +1,23 @@
-from flask import Blueprint, render_template, abort, request, Response, jsonify, redirect
+from flask import Blueprint, render_template, abort, request, Response, jsonify, redirect, current_app
 from markupsafe import Markup
 import urllib.parse
 import os
+import hmac
 import hashlib
 import logging
-from api.utils.markdown import convert_markdown_to_html, remove_first_h1, extract_title_from_markdown, extract_description_from_markdown
-from api.utils.github_utils import get_file_at_commit, get_template_history, get_document_contributors, get_document_author, is_recently_updated
+from api.utils.markdown import convert_markdown_to_html, extract_title_from_markdown, extract_description_from_markdown
+from api.utils.github_utils import get_file_at_commit, get_template_history, get_document_contributors, get_document_author, is_recently_updated, github_cache, github_metrics
 from api.utils.sanitization import sanitize_filename, is_safe_path
 from api.utils.documents import get_all_documents, get_documents_by_category, get_subdocuments, get_first_subdocument, get_sibling_navigation
 from api.utils.analytics import analytics_db
-from api.utils.sitemap_generator import generate_sitemap
-from api.config import SITE_CONFIG, GITHUB_REPO
+from api.utils.sitemap_generator import get_sitemap
+from api.utils.render_cache import render_cache, highlight_cache
+from api.utils.document_index import document_index
+from api.utils.recent_updates import recent_updates
+from api.utils.git_history import local_history
+from api.utils.github_client import github_client
+from api.utils.prerendered import prerendered_site, PRERENDERED_ENCODINGS
+from api.config import SITE_CONFIG, GITHUB_REPO, STATS_TOKEN
 
 docs_bp = Blueprint('docs', __name__)
 logger = logging.getLogger(__name__)
@@ -18,10 +25,11 @@ logger = logging.getLogger(__name__)
 @docs_bp.route('/sitemap.xml')
 def sitemap():
     try:
-        sitemap_xml = generate_sitemap()
+        sitemap_xml, etag = get_sitemap()
         response = Response(sitemap_xml, mimetype='application/xml')
         response.headers['Cache-Control'] = 'public, max-age=3600'
-        return response
+        response.set_etag(etag)
+        return response.make_conditional(request)
     except Exception as e:
         logger.error(f"Error generating sitemap: {e}")
         abort(500)
@@ -95,6 +103,40 @@ def api_popular_docs():
         logger.error(f"Error getting popular docs: {e}")
         return jsonify([]), 500
 
+@docs_bp.route('/api/analytics/history/<path:doc_name>')
+def api_view_history(doc_name):
+    granularity = request.args.get('granularity', 'daily')
+    if granularity not in ('hourly', 'daily'):
+        return jsonify({'error': 'granularity must be hourly or daily'}), 400
+    limit = max(1, min(request.args.get('limit', 30, type=int), 1000))
+    return jsonify(analytics_db.get_view_history(doc_name, granularity, limit))
+
+def stats_allowed():
+    if current_app.debug:
+        return True
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return bool(STATS_TOKEN) and scheme == 'Bearer' and hmac.compare_digest(token.strip(), STATS_TOKEN)
+
+@docs_bp.route('/api/cache/stats')
+def api_cache_stats():
+    if not stats_allowed():
+        abort(404)
+
+    return jsonify({
+        'render': render_cache.stats(),
+        'highlight': highlight_cache.stats(),
+        'catalog': document_index.stats(),
+        'history': recent_updates.stats(),
+        'git_history': local_history.stats(),
+        'github_cache': github_cache.stats(),
+        'github': github_metrics.stats(),
+        'github_client': github_client.stats(),
+        'analytics': analytics_db.buffer_stats(),
+        'analytics_pool': analytics_db.pool_stats(),
+        'analytics_compaction': analytics_db.compaction_stats(),
+        'prerendered': prerendered_site.stats()
+    })
+
 @docs_bp.route('/')
 def index():
     try:
@@ -112,6 +154,73 @@ def index():
                              error_code="500", 
                              error_message=f"Internal Server Error: {str(e)}"), 500
 
+def render_markdown_document(template_name, md_content, is_print=False, view_count=0, prerendered=False):
+    with github_client.budget():
+        git_history = get_template_history(template_name)
+        contributors = get_document_contributors(template_name)
+        author = get_document_author(template_name)
+        recently_updated = is_recently_updated(template_name)
+
+    subdocuments = get_subdocuments(template_name)
+    prev_doc, next_doc = get_sibling_navigation(template_name)
+
+    title = extract_title_from_markdown(md_content) or template_name.split('/')[-1].replace('_', ' ').title()
+    description = extract_description_from_markdown(md_content)
+
+    safe_html = convert_markdown_to_html(md_content, drop_first_h1=True)
+
+    template = 'print.html' if is_print else 'markdown_base.html'
+
+    breadcrumbs = []
+    if '/' in template_name:
+        parts = template_name.split('/')
+        for i, part in enumerate(parts):
+            path = '/'.join(parts[:i+1])
+            name = part.replace('_', ' ').title()
+            if i == len(parts) - 1:
+                breadcrumbs.append({'name': name, 'path': path, 'is_current': True})
+            else:
+                breadcrumbs.append({'name': name, 'path': path, 'is_current': False})
+
+    return render_template(
+        template, 
+        content=Markup(safe_html), 
+        title=title,
+        description=description,
+        doc_name=template_name,
+        versions=git_history,
+        contributors=contributors,
+        author=author,
+        view_count=view_count,
+        prerendered=prerendered,
+        recently_updated=recently_updated,
+        is_print=is_print,
+        is_version=False,
+        github_repo=GITHUB_REPO,
+        github_edit_url=f"{SITE_CONFIG['github_edit_base']}/{template_name}.md",
+        subdocuments=subdocuments,
+        prev_doc=prev_doc,
+        next_doc=next_doc,
+        breadcrumbs=breadcrumbs,
+        get_subdocuments=get_subdocuments
+    )
+
+def serve_prerendered(template_name, md_path, is_print):
+    encodings = [encoding for encoding in PRERENDERED_ENCODINGS if request.accept_encodings[encoding]]
+    page = prerendered_site.find(template_name, 'print' if is_print else 'page', md_path, encodings)
+    if page is None:
+        return None
+
+    file_path, encoding = page
+    with open(file_path, 'rb') as f:
+        response = Response(f.read(), mimetype='text/html')
+
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['X-Prerendered'] = '1'
+    return response
+
 @docs_bp.route('/<path:template_name>')
 def serve_template(template_name):
     try:
@@ -122,7 +231,6 @@ def serve_template(template_name):
         logger.info(f"Serving template: {template_name}")
 
         is_print = request.args.get('print') == '1'
-        is_version = False
 
         docs_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates', 'docs')
 
@@ -154,65 +262,21 @@ def serve_template(template_name):
             logger.warning(f"Failed to record view for {template_name}: {e}")
             view_count = 0
 
-        git_history = get_template_history(template_name)
-        contributors = get_document_contributors(template_name)
-        author = get_document_author(template_name)
-        recently_updated = is_recently_updated(template_name)
-
-        subdocuments = get_subdocuments(template_name)
-        prev_doc, next_doc = get_sibling_navigation(template_name)
-
         if os.path.exists(html_path) and is_safe_path(html_path, docs_dir):
             return render_template(f"docs/{template_name}.html")
 
         elif os.path.exists(md_path) and is_safe_path(md_path, docs_dir):
             try:
-                with open(md_path, 'r', encoding='utf-8') as f:
-                    md_content = f.read()
-
-                title = extract_title_from_markdown(md_content) or template_name.split('/')[-1].replace('_', ' ').title()
-                description = extract_description_from_markdown(md_content)
-
-                safe_html = convert_markdown_to_html(md_content)
-                safe_html = remove_first_h1(safe_html)
-
-                template = 'print.html' if is_print else 'markdown_base.html'
-
-                breadcrumbs = []
-                if '/' in template_name:
-                    parts = template_name.split('/')
-                    for i, part in enumerate(parts):
-                        path = '/'.join(parts[:i+1])
-                        name = part.replace('_', ' ').title()
-                        if i == len(parts) - 1:
-                            breadcrumbs.append({'name': name, 'path': path, 'is_current': True})
-                        else:
-                            breadcrumbs.append({'name': name, 'path': path, 'is_current': False})
-
-                response = render_template(
-                    template, 
-                    content=Markup(safe_html), 
-                    title=title,
-                    description=description,
-                    doc_name=template_name,
-                    versions=git_history,
-                    contributors=contributors,
-                    author=author,
-                    view_count=view_count,
-                    recently_updated=recently_updated,
-                    is_print=is_print,
-                    is_version=is_version,
-                    github_repo=GITHUB_REPO,
-                    github_edit_url=f"{SITE_CONFIG['github_edit_base']}/{template_name}.md",
-                    subdocuments=subdocuments,
-                    prev_doc=prev_doc,
-                    next_doc=next_doc,
-                    breadcrumbs=breadcrumbs,
-                    get_subdocuments=get_subdocuments
-                )
+                response = serve_prerendered(template_name, md_path, is_print)
+
+                if response is None:
+                    with open(md_path, 'r', encoding='utf-8') as f:
+                        md_content = f.read()
+
+                    response = render_markdown_document(template_name, md_content, is_print, view_count)
 
                 if not is_print:
-                    response = Response(response)
+                    response = Response(response) if isinstance(response, str) else response
                     response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
                     response.headers['Pragma'] = 'no-cache'
                     response.headers['Expires'] = '0'
@@ -250,12 +314,12 @@ def view_version(template_name, commit_hash):
         title = extract_title_from_markdown(md_content) or template_name.split('/')[-1].replace('_', ' ').title()
         description = extract_description_from_markdown(md_content)
 
-        safe_html = convert_markdown_to_html(md_content)
-        safe_html = remove_first_h1(safe_html)
+        safe_html = convert_markdown_to_html(md_content, drop_first_h1=True)
 
-        git_history = get_template_history(template_name)
-        contributors = get_document_contributors(template_name)
-        author = get_document_author(template_name)
+        with github_client.budget():
+            git_history = get_template_history(template_name)
+            contributors = get_document_contributors(template_name)
+            author = get_document_author(template_name)
         view_count = analytics_db.get_view_count(template_name)
 
         template = 'print.html' if is_print else 'markdown_base.html'
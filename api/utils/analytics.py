@@ -1,9 +1,9 @@
-import psycopg2
-import psycopg2.extras
-import sqlite3
 import os
-from datetime import datetime, timedelta
-from api.config import DATABASE_CONFIG
+import atexit
+import heapq
+from datetime import datetime, date, timedelta
+from api.config import DATABASE_CONFIG, ANALYTICS_CONFIG, POOL_CONFIG
+from api.utils.analytics_backends import MemoryBackend, SQLiteBackend, PostgresBackend, MySQLBackend, HOURLY, DAILY
 import threading
 import time
 import logging
@@ -11,111 +11,239 @@ from urllib.parse import urlparse
 
 logger = logging.getLogger(__name__)
 
+class ViewBuffer:
+    def __init__(self, write, flush_interval=1.0, flush_events=500, max_pending_logs=100000):
+        self.write = write
+        self.flush_interval = flush_interval
+        self.flush_events = flush_events
+        self.max_pending_logs = max_pending_logs
+        self._counts = {}
+        self._last_viewed = {}
+        self._logs = []
+        self._in_flight = {}
+        self._flushed = {}
+        self._events = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.flushes = 0
+        self.flushed_views = 0
+        self.failed_flushes = 0
+        self.dropped_logs = 0
+        self.last_flush_ms = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='analytics-flush', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add(self, document_name, ip_hash=None, user_agent=None):
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._counts[document_name] = self._counts.get(document_name, 0) + 1
+            self._last_viewed[document_name] = now
+            self._logs.append((document_name, ip_hash, user_agent, now))
+            self._events += 1
+            if self._events >= self.flush_events:
+                self._wake.set()
+
+    def pending(self, document_name):
+        with self._lock:
+            return self._counts.get(document_name, 0) + self._in_flight.get(document_name, 0)
+
+    # {document_name: (views not yet written, last buffered view or None)}
+    def pending_views(self):
+        with self._lock:
+            names = set(self._counts) | set(self._in_flight)
+            return {
+                name: (self._counts.get(name, 0) + self._in_flight.get(name, 0), self._last_viewed.get(name))
+                for name in names
+            }
+
+    # Last flushed count plus views not yet written, counting a flush that
+    # is in progress as pending until its totals are read back. Flushed
+    # counts are only kept until the next flush, which replaces them with
+    # the totals it read back, so the map holds one interval's documents and
+    # picks up views other processes wrote.
+    def view_count(self, document_name, load):
+        with self._lock:
+            flushed = self._flushed.get(document_name)
+        if flushed is None:
+            flushed = load(document_name)
+            with self._lock:
+                flushed = self._flushed.setdefault(document_name, flushed)
+        return flushed + self.pending(document_name)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if not self._counts and not self._logs:
+                    self._flushed = {}
+                    return True
+                counts, last_viewed, logs = self._counts, self._last_viewed, self._logs
+                self._counts, self._last_viewed, self._logs = {}, {}, []
+                self._in_flight = counts
+                self._events = 0
+
+            start = time.perf_counter()
+            try:
+                totals = self.write(counts, last_viewed, logs)
+            except Exception as e:
+                logger.error(f"Failed to flush {sum(counts.values())} buffered views: {e}")
+                with self._lock:
+                    for document_name, count in counts.items():
+                        self._counts[document_name] = self._counts.get(document_name, 0) + count
+                        self._last_viewed.setdefault(document_name, last_viewed[document_name])
+                    self._logs = logs + self._logs
+                    overflow = len(self._logs) - self.max_pending_logs
+                    if overflow > 0:
+                        del self._logs[:overflow]
+                        self.dropped_logs += overflow
+                    self._in_flight = {}
+                    self.failed_flushes += 1
+                return False
+
+            with self._lock:
+                self._flushed = dict(totals)
+                self._in_flight = {}
+                self.flushes += 1
+                self.flushed_views += sum(counts.values())
+                self.last_flush_ms = round((time.perf_counter() - start) * 1000, 2)
+            return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending_views': sum(self._counts.values()),
+                'pending_logs': len(self._logs),
+                'flushes': self.flushes,
+                'flushed_views': self.flushed_views,
+                'failed_flushes': self.failed_flushes,
+                'dropped_logs': self.dropped_logs,
+                'last_flush_ms': self.last_flush_ms
+            }
+
 class AnalyticsDB:
-    def __init__(self):
+    def __init__(self, backend=None):
         self.config = DATABASE_CONFIG.copy()
-        self._lock = threading.Lock()
         self._initialized = False
-        self._connection_pool = {}
+        self._buffer = None
+        self._backend = backend
+        self._backend_resolved = backend is not None
+        self._backend_lock = threading.Lock()
         self._vercel_mode = os.environ.get('VERCEL') == '1'
         self._graceful_degradation = True
+        self._compact_lock = threading.Lock()
+        self._compactor_pid = None
+        self.compactions = 0
+        self.days_rolled_up = 0
+        self.logs_deleted = 0
+        self.last_compaction = None
+        self.last_compaction_ms = None
         
     def is_vercel_environment(self):
         return self._vercel_mode or os.environ.get('VERCEL_ENV') is not None
-        
-    def get_connection(self):
-        thread_id = threading.get_ident()
-        
-        if thread_id in self._connection_pool:
-            try:
-                conn = self._connection_pool[thread_id]
-                if self.config['type'] in ['postgres', 'postgresql']:
-                    with conn.cursor() as cursor:
-                        cursor.execute('SELECT 1')
-                    return conn
-                elif self.config['type'] == 'mysql':
-                    conn.ping(reconnect=True)
-                    return conn
-                else:
-                    conn.execute('SELECT 1')
-                    return conn
-            except:
-                if thread_id in self._connection_pool:
-                    del self._connection_pool[thread_id]
-        
+
+    # The backend is picked once: DB_TYPE=memory, then POSTGRES_URL or
+    # DATABASE_URL (postgres:// or mysql://), then the configured Postgres or
+    # MySQL server, then SQLite (never on Vercel, whose filesystem doesn't
+    # persist). A server is kept only if its first connection succeeds.
+    # Without fallback, a configured server that can't be reached raises, so
+    # init_db can retry it before settling for SQLite (or nothing on Vercel).
+    def _create_backend(self, fallback=True):
+        if self.config['type'] == 'memory':
+            return MemoryBackend()
+
+        pool_options = {
+            'max_size': POOL_CONFIG['max_size'],
+            'timeout': POOL_CONFIG['timeout'],
+            'idle_timeout': POOL_CONFIG['idle_timeout'],
+            'max_lifetime': POOL_CONFIG['max_lifetime'],
+            'check_after': POOL_CONFIG['check_after']
+        }
+
+        candidates = []
         database_url = os.environ.get('POSTGRES_URL') or os.environ.get('DATABASE_URL')
-        
         if database_url:
+            parsed = urlparse(database_url)
+            backend_class = MySQLBackend if parsed.scheme.startswith('mysql') else PostgresBackend
+            candidates.append((backend_class, {
+                'host': parsed.hostname,
+                'port': parsed.port or backend_class.default_port,
+                'user': parsed.username,
+                'password': parsed.password,
+                'database': parsed.path[1:]
+            }))
+        backend_class = {
+            'postgres': PostgresBackend,
+            'postgresql': PostgresBackend,
+            'mysql': MySQLBackend,
+            'mariadb': MySQLBackend
+        }.get(self.config['type'])
+        if backend_class is not None:
+            candidates.append((backend_class, {
+                'host': self.config['host'],
+                'port': self.config['port'],
+                'user': self.config['username'],
+                'password': self.config['password'],
+                'database': self.config['database']
+            }))
+
+        for backend_class, params in candidates:
             try:
-                parsed = urlparse(database_url)
-                
-                conn = psycopg2.connect(
-                    host=parsed.hostname,
-                    port=parsed.port or 5432,
-                    user=parsed.username,
-                    password=parsed.password,
-                    database=parsed.path[1:],
-                    sslmode='require',
-                    connect_timeout=10
-                )
-                conn.autocommit = False
-                logger.info(f"PostgreSQL connection successful to {parsed.hostname}")
-                self._connection_pool[thread_id] = conn
-                self.config['type'] = 'postgres'
-                return conn
-            except Exception as e:
-                logger.error(f"PostgreSQL connection failed: {e}")
-        
-        if self.config['type'] in ['postgres', 'postgresql']:
-            try:
-                conn = psycopg2.connect(
-                    host=self.config['host'],
-                    port=self.config['port'],
-                    user=self.config['username'],
-                    password=self.config['password'],
-                    database=self.config['database'],
-                    sslmode='require',
-                    connect_timeout=10
-                )
-                conn.autocommit = False
-                logger.info(f"PostgreSQL connection successful to {self.config['host']}")
-                self._connection_pool[thread_id] = conn
-                return conn
-            except Exception as e:
-                logger.warning(f"PostgreSQL connection failed: {e}")
-                if self.is_vercel_environment():
-                    logger.warning("Running on Vercel without external database - analytics disabled")
-                    return None
-        
-        if not self.is_vercel_environment():
-            try:
-                db_path = self.config.get('path', os.path.join(os.path.dirname(__file__), '..', 'data', 'analytics.db'))
-                os.makedirs(os.path.dirname(db_path), exist_ok=True)
-                
-                conn = sqlite3.connect(
-                    db_path, 
-                    timeout=30.0, 
-                    check_same_thread=False,
-                    isolation_level=None
-                )
-                conn.execute('PRAGMA journal_mode=WAL')
-                conn.execute('PRAGMA synchronous=NORMAL')
-                conn.execute('PRAGMA cache_size=10000')
-                conn.execute('PRAGMA temp_store=memory')
-                
-                self._connection_pool[thread_id] = conn
-                self.config['type'] = 'sqlite'
-                return conn
+                backend = backend_class(params, pool_options)
+                backend.connect()
+                logger.info(f"{backend_class.name} connection successful to {params['host']}")
+                return backend
             except Exception as e:
-                logger.error(f"SQLite connection failed: {e}")
-                
-        return None
+                logger.error(f"{backend_class.name} connection failed: {e}")
+                if not fallback and (backend_class, params) == candidates[-1]:
+                    raise
+
+        if self.is_vercel_environment():
+            logger.warning("Running on Vercel without external database - analytics disabled")
+            return None
+
+        db_path = self.config.get('path', os.path.join(os.path.dirname(__file__), '..', 'data', 'analytics.db'))
+        return SQLiteBackend(db_path, self.config['busy_timeout'], pool_options)
+
+    @property
+    def backend(self):
+        return self._resolve_backend()
+
+    # Only a backend that was actually picked is kept; a failed attempt
+    # leaves the next one to try the servers again.
+    def _resolve_backend(self, fallback=True):
+        if not self._backend_resolved:
+            with self._backend_lock:
+                if not self._backend_resolved:
+                    self._backend = self._create_backend(fallback)
+                    self._backend_resolved = True
+                    if self._backend is not None:
+                        self.config['type'] = self._backend.name
+        return self._backend
     
     def init_db(self):
         if self._initialized:
             return True
         
-        if self.is_vercel_environment() and not os.environ.get('POSTGRES_URL') and not os.environ.get('DATABASE_URL'):
+        if self.is_vercel_environment() and not os.environ.get('POSTGRES_URL') and not os.environ.get('DATABASE_URL') and not self._backend_resolved:
             logger.warning("Analytics disabled on Vercel - no external database configured")
             self._initialized = True
             self._graceful_degradation = True
@@ -125,91 +253,23 @@ class AnalyticsDB:
         for attempt in range(max_retries):
             try:
                 logger.info(f"Database initialization attempt {attempt + 1}/{max_retries}")
-                conn = self.get_connection()
-                
-                if conn is None:
+                backend = self._resolve_backend(fallback=attempt == max_retries - 1)
+                if backend is None:
                     logger.warning("No database connection available - analytics disabled")
                     self._initialized = True
                     self._graceful_degradation = True
                     return True
-                
-                cursor = conn.cursor()
-                
-                if self.config['type'] in ['postgres', 'postgresql']:
-                    cursor.execute('''
-                        CREATE TABLE IF NOT EXISTS page_views (
-                            id SERIAL PRIMARY KEY,
-                            document_name VARCHAR(255) NOT NULL UNIQUE,
-                            view_count INTEGER DEFAULT 0,
-                            last_viewed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                        )
-                    ''')
-                    
-                    cursor.execute('''
-                        CREATE INDEX IF NOT EXISTS idx_view_count ON page_views(view_count DESC)
-                    ''')
-                    cursor.execute('''
-                        CREATE INDEX IF NOT EXISTS idx_last_viewed ON page_views(last_viewed DESC)
-                    ''')
-                    cursor.execute('''
-                        CREATE INDEX IF NOT EXISTS idx_document_name ON page_views(document_name)
-                    ''')
-                    
-                    cursor.execute('''
-                        CREATE TABLE IF NOT EXISTS view_logs (
-                            id SERIAL PRIMARY KEY,
-                            document_name VARCHAR(255) NOT NULL,
-                            ip_hash VARCHAR(64),
-                            user_agent TEXT,
-                            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                        )
-                    ''')
-                    
-                    cursor.execute('''
-                        CREATE INDEX IF NOT EXISTS idx_log_doc_name ON view_logs(document_name)
-                    ''')
-                    cursor.execute('''
-                        CREATE INDEX IF NOT EXISTS idx_log_timestamp ON view_logs(timestamp DESC)
-                    ''')
-                    cursor.execute('''
-                        CREATE INDEX IF NOT EXISTS idx_log_ip_time ON view_logs(ip_hash, timestamp)
-                    ''')
-                    
-                    conn.commit()
-                    
-                else:
-                    cursor.execute('''
-                        CREATE TABLE IF NOT EXISTS page_views (
-                            id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            document_name TEXT NOT NULL UNIQUE,
-                            view_count INTEGER DEFAULT 0,
-                            last_viewed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                        )
-                    ''')
-                    
-                    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_view_count ON page_views(view_count DESC)''')
-                    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_last_viewed ON page_views(last_viewed DESC)''')
-                    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_document_name ON page_views(document_name)''')
-                    
-                    cursor.execute('''
-                        CREATE TABLE IF NOT EXISTS view_logs (
-                            id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            document_name TEXT NOT NULL,
-                            ip_hash TEXT,
-                            user_agent TEXT,
-                            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                        )
-                    ''')
-                    
-                    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_log_doc_name ON view_logs(document_name)''')
-                    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_log_timestamp ON view_logs(timestamp DESC)''')
-                    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_log_ip_time ON view_logs(ip_hash, timestamp)''')
-                
-                cursor.execute('SELECT COUNT(*) FROM page_views')
-                count = cursor.fetchone()[0]
-                logger.info(f"Database initialized successfully using {self.config['type']}, current documents: {count}")
+
+                backend.create_schema()
+                count = backend.document_count()
+                logger.info(f"Database initialized successfully using {backend.name}, current documents: {count}")
+                if ANALYTICS_CONFIG['write_behind'] and self._buffer is None:
+                    self._buffer = ViewBuffer(
+                        self._write_views,
+                        ANALYTICS_CONFIG['flush_interval_ms'] / 1000,
+                        ANALYTICS_CONFIG['flush_events']
+                    )
+                    self._buffer.start()
                 self._initialized = True
                 self._graceful_degradation = False
                 return True
@@ -233,99 +293,138 @@ class AnalyticsDB:
         if not document_name or not document_name.strip():
             logger.warning("Empty document name provided")
             return 0
+
+        if self._buffer is not None:
+            self._buffer.add(document_name, ip_hash, user_agent)
+            return self._buffer.view_count(document_name, self._read_view_count)
             
-        with self._lock:
-            max_retries = 2
-            for attempt in range(max_retries):
-                try:
-                    conn = self.get_connection()
-                    if conn is None:
-                        return 0
-                        
-                    cursor = conn.cursor()
-                    
-                    if self.config['type'] in ['postgres', 'postgresql']:
-                        cursor.execute('''
-                            INSERT INTO page_views (document_name, view_count, last_viewed, created_at)
-                            VALUES (%s, 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-                            ON CONFLICT (document_name) 
-                            DO UPDATE SET 
-                                view_count = page_views.view_count + 1, 
-                                last_viewed = CURRENT_TIMESTAMP
-                            RETURNING view_count
-                        ''', (document_name,))
-                        
-                        result = cursor.fetchone()
-                        view_count = result[0] if result else 1
-                        
-                        cursor.execute('''
-                            INSERT INTO view_logs (document_name, ip_hash, user_agent, timestamp)
-                            VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
-                        ''', (document_name, ip_hash, user_agent))
-                        
-                        conn.commit()
-                        
-                    else:
-                        cursor.execute('SELECT view_count FROM page_views WHERE document_name = ?', (document_name,))
-                        result = cursor.fetchone()
-                        current_count = result[0] if result else 0
-                        new_count = current_count + 1
-                        
-                        if current_count == 0:
-                            cursor.execute('''
-                                INSERT INTO page_views (document_name, view_count, last_viewed, created_at)
-                                VALUES (?, ?, ?, ?)
-                            ''', (document_name, new_count, datetime.now().isoformat(), datetime.now().isoformat()))
-                        else:
-                            cursor.execute('''
-                                UPDATE page_views 
-                                SET view_count = ?, last_viewed = ?
-                                WHERE document_name = ?
-                            ''', (new_count, datetime.now().isoformat(), document_name))
-                        
-                        cursor.execute('''
-                            INSERT INTO view_logs (document_name, ip_hash, user_agent, timestamp)
-                            VALUES (?, ?, ?, ?)
-                        ''', (document_name, ip_hash, user_agent, datetime.now().isoformat()))
-                        
-                        view_count = new_count
-                    
-                    logger.info(f"View recorded for {document_name}: {view_count}")
-                    return view_count
-                    
-                except Exception as e:
+        max_retries = 2
+        for attempt in range(max_retries):
+            try:
+                view_count = self.backend.record_view(document_name, ip_hash, user_agent, datetime.now().isoformat())
+                logger.info(f"View recorded for {document_name}: {view_count}")
+                return view_count
+                
+            except Exception as e:
+                if self.backend.is_busy(e):
+                    logger.warning(f"Database still busy after {self.config['busy_timeout']}s recording view for {document_name} (attempt {attempt + 1})")
+                else:
                     logger.error(f"Error recording view for {document_name} (attempt {attempt + 1}): {e}")
-                    if attempt == max_retries - 1:
-                        logger.error(f"Failed to record view for {document_name} after all retries")
-                        return 0
-                    time.sleep(0.1 * (attempt + 1))
-            
-            return 0
-    
+                if attempt == max_retries - 1:
+                    logger.error(f"Failed to record view for {document_name} after all retries")
+                    return 0
+                time.sleep(0.1 * (attempt + 1))
+        
+        return 0
+
+    # Writes one batch of buffered views in a single transaction and returns
+    # the stored totals of the documents it touched.
+    def _write_views(self, counts, last_viewed, logs):
+        totals = self.backend.write_views(counts, last_viewed, logs)
+        logger.debug(f"Flushed {sum(counts.values())} views and {len(logs)} log rows for {len(counts)} documents")
+        return totals
+
+    # Started by the app from its first request rather than from init_db, so
+    # it only ever runs in the process serving requests: never in a parent
+    # that is about to fork workers, nor in scripts and benchmarks.
+    def start_compaction(self):
+        if ANALYTICS_CONFIG['compact_interval'] <= 0 or self._compactor_pid == os.getpid():
+            return
+        if not self._initialized or self._graceful_degradation:
+            return
+        with self._compact_lock:
+            if self._compactor_pid == os.getpid():
+                return
+            self._compactor_pid = os.getpid()
+        threading.Thread(target=self._run_compaction, name='analytics-compact', daemon=True).start()
+
+    def _run_compaction(self):
+        while True:
+            try:
+                self.compact_logs()
+            except Exception as e:
+                logger.error(f"Failed to compact view logs: {e}")
+            time.sleep(ANALYTICS_CONFIG['compact_interval'])
+
+    # Rolls every finished day since the watermark up from the raw logs, then
+    # deletes rolled-up logs older than the retention window in short
+    # batches, so concurrent inserts only ever wait for one batch.
+    def compact_logs(self, retention_days=None, batch_size=None):
+        retention_days = ANALYTICS_CONFIG['log_retention_days'] if retention_days is None else retention_days
+        batch_size = batch_size or ANALYTICS_CONFIG['compact_batch_size']
+        if not self._initialized or self._graceful_degradation:
+            return None
+
+        with self._compact_lock:
+            start = time.perf_counter()
+            self.flush()
+            backend = self.backend
+            today = date.today()
+            day = backend.rolled_up_until() or backend.oldest_log_day()
+            rolled_up = 0
+            while day is not None and day < today:
+                backend.rollup_day(day)
+                day += timedelta(days=1)
+                rolled_up += 1
+
+            deleted = 0
+            if day is not None and retention_days >= 0:
+                cutoff = min(day, today - timedelta(days=retention_days))
+                while True:
+                    batch = backend.delete_logs_before(cutoff, batch_size)
+                    deleted += batch
+                    if batch < batch_size:
+                        break
+
+            self.compactions += 1
+            self.days_rolled_up += rolled_up
+            self.logs_deleted += deleted
+            self.last_compaction = datetime.now().isoformat()
+            self.last_compaction_ms = round((time.perf_counter() - start) * 1000, 2)
+            if rolled_up or deleted:
+                logger.info(f"Rolled up {rolled_up} days of view logs and deleted {deleted} raw log rows")
+            return {'days_rolled_up': rolled_up, 'logs_deleted': deleted, 'rolled_up_until': day.isoformat() if day else None}
+
+    def compaction_stats(self):
+        return {
+            'compactions': self.compactions,
+            'days_rolled_up': self.days_rolled_up,
+            'logs_deleted': self.logs_deleted,
+            'last_compaction': self.last_compaction,
+            'last_compaction_ms': self.last_compaction_ms
+        }
+
+    def flush(self):
+        if self._buffer is not None:
+            return self._buffer.flush()
+        return True
+
+    def buffer_stats(self):
+        if self._buffer is None:
+            return {'write_behind': False}
+        return dict(self._buffer.stats(), write_behind=True)
+
+    def pool_stats(self):
+        if self._backend is None:
+            return None
+        return self._backend.stats()
+
     def get_view_count(self, document_name):
         if not self._initialized or self._graceful_degradation:
             return 0
         
         if not document_name or not document_name.strip():
             return 0
-            
+
+        if self._buffer is not None:
+            return self._buffer.view_count(document_name, self._read_view_count)
+        return self._read_view_count(document_name)
+
+    def _read_view_count(self, document_name):
         max_retries = 2
         for attempt in range(max_retries):
             try:
-                conn = self.get_connection()
-                if conn is None:
-                    return 0
-                    
-                cursor = conn.cursor()
-                
-                if self.config['type'] in ['postgres', 'postgresql']:
-                    cursor.execute('SELECT view_count FROM page_views WHERE document_name = %s', (document_name,))
-                else:
-                    cursor.execute('SELECT view_count FROM page_views WHERE document_name = ?', (document_name,))
-                
-                result = cursor.fetchone()
-                count = result[0] if result else 0
-                
+                count = self.backend.view_count(document_name)
                 logger.debug(f"Retrieved view count for {document_name}: {count}")
                 return count
                 
@@ -344,32 +443,11 @@ class AnalyticsDB:
         max_retries = 2
         for attempt in range(max_retries):
             try:
-                conn = self.get_connection()
-                if conn is None:
-                    return []
-                    
-                cursor = conn.cursor()
-                
-                if self.config['type'] in ['postgres', 'postgresql']:
-                    cursor.execute('''
-                        SELECT document_name, view_count, last_viewed
-                        FROM page_views
-                        WHERE view_count > 0
-                        ORDER BY view_count DESC
-                        LIMIT %s
-                    ''', (limit,))
+                if self._buffer is not None:
+                    results = self._add_pending_views(limit, self._buffer.pending_views())
                 else:
-                    cursor.execute('''
-                        SELECT document_name, view_count, last_viewed
-                        FROM page_views
-                        WHERE view_count > 0
-                        ORDER BY view_count DESC
-                        LIMIT ?
-                    ''', (limit,))
-                
-                results = cursor.fetchall()
+                    results = self.backend.popular_documents(limit)
                 popular_docs = [{'name': row[0], 'views': row[1], 'last_viewed': row[2]} for row in results]
-                
                 logger.debug(f"Retrieved {len(popular_docs)} popular documents")
                 return popular_docs
                 
@@ -381,12 +459,37 @@ class AnalyticsDB:
         
         return []
     
+    # A document outside the stored top limit can only overtake it with
+    # buffered views, so reading limit rows past the buffered documents and
+    # the stored totals of the ones missing from them is enough.
+    def _add_pending_views(self, limit, pending):
+        rows = {row[0]: (row[1], row[2]) for row in self.backend.popular_documents(limit + len(pending))}
+        missing = [name for name in pending if name not in rows]
+        stored = self.backend.view_counts(missing) if missing else {}
+        for name, (count, last_viewed) in pending.items():
+            views, stored_last_viewed = rows.get(name, (stored.get(name, 0), None))
+            rows[name] = (views + count, last_viewed or stored_last_viewed)
+        return heapq.nlargest(limit, ((name, views, last_viewed) for name, (views, last_viewed) in rows.items()), key=lambda row: row[1])
+
+    # Newest buckets first. unique_visitors stays 0 for the current day until
+    # it has been rolled up.
+    def get_view_history(self, document_name, granularity='daily', limit=30):
+        if not self._initialized or self._graceful_degradation:
+            return []
+
+        table = HOURLY if granularity == 'hourly' else DAILY
+        try:
+            rows = self.backend.rollups(document_name, table, limit)
+            return [{'bucket': str(row[0]), 'views': row[1], 'unique_visitors': row[2]} for row in rows]
+        except Exception as e:
+            logger.error(f"Error getting view history for {document_name}: {e}")
+            return []
+    
     def __del__(self):
         try:
-            for conn in self._connection_pool.values():
-                if conn:
-                    conn.close()
+            if self._backend is not None:
+                self._backend.close()
         except:
             pass
 
-analytics_db = AnalyticsDB()
\ No newline at end of file
+analytics_db = AnalyticsDB()
@@ -0,0 +1,692 @@
+import os
+import heapq
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import date, timedelta
+import psycopg2
+import psycopg2.extras
+from api.utils.connection_pool import ConnectionPool
+
+try:
+    import pymysql
+except ImportError:
+    pymysql = None
+
+logger = logging.getLogger(__name__)
+
+# RETURNING needs SQLite 3.35; older libraries read the count back inside the
+# same transaction instead.
+SQLITE_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+READ_CHUNK = 500
+
+HOURLY = 'view_rollups_hourly'
+DAILY = 'view_rollups_daily'
+
+# Buckets are written as 'YYYY-MM-DD HH:00:00' and 'YYYY-MM-DD', the text
+# SQLite's strftime() and date() produce from the ISO view timestamps.
+def hour_bucket(timestamp):
+    return f"{timestamp[:10]} {timestamp[11:13]}:00:00"
+
+def day_bucket(timestamp):
+    return timestamp[:10]
+
+def count_buckets(logs):
+    counts = {HOURLY: {}, DAILY: {}}
+    for document_name, _, _, timestamp in logs:
+        for table, bucket in ((HOURLY, hour_bucket(timestamp)), (DAILY, day_bucket(timestamp))):
+            counts[table][document_name, bucket] = counts[table].get((document_name, bucket), 0) + 1
+    return counts
+
+def rollup_schema(text_type, hour_type, day_type, options=''):
+    return tuple(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                document_name {text_type} NOT NULL,
+                bucket {bucket_type} NOT NULL,
+                views INTEGER NOT NULL DEFAULT 0,
+                unique_visitors INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (document_name, bucket)
+            ){options}
+        ''' for table, bucket_type in ((HOURLY, hour_type), (DAILY, day_type))) + (
+        f'CREATE TABLE IF NOT EXISTS analytics_state (name {text_type} PRIMARY KEY, value {text_type}){options}',
+    )
+
+# Storage behind AnalyticsDB. Timestamps arrive as ISO strings; view counts
+# come back as {document_name: total} for the documents a batch touched, and
+# popular documents as (document_name, view_count, last_viewed) rows.
+#
+# Every write also adds its views to the hourly and daily rollups.
+# unique_visitors is only known once a whole day is rolled up from the raw
+# logs (rollup_day), which recounts both columns, so running it twice is
+# harmless. rolled_up_until is the first day that hasn't been.
+class AnalyticsBackend:
+    name = None
+
+    def create_schema(self):
+        raise NotImplementedError
+
+    def record_view(self, document_name, ip_hash, user_agent, now):
+        raise NotImplementedError
+
+    def write_views(self, counts, last_viewed, logs):
+        raise NotImplementedError
+
+    def view_count(self, document_name):
+        raise NotImplementedError
+
+    # {document_name: view_count} for the names that have a row.
+    def view_counts(self, names):
+        raise NotImplementedError
+
+    def popular_documents(self, limit):
+        raise NotImplementedError
+
+    def document_count(self):
+        raise NotImplementedError
+
+    def rollups(self, document_name, table, limit):
+        raise NotImplementedError
+
+    def rolled_up_until(self):
+        raise NotImplementedError
+
+    def oldest_log_day(self):
+        raise NotImplementedError
+
+    def rollup_day(self, day):
+        raise NotImplementedError
+
+    # Deletes at most limit raw logs from before day, returning how many.
+    def delete_logs_before(self, day, limit):
+        raise NotImplementedError
+
+    # Whether an error only means another writer held the database for too
+    # long, so the caller can retry.
+    def is_busy(self, error):
+        return False
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {'type': self.name}
+
+# Keeps everything in process memory: no I/O, nothing persisted. Meant for
+# tests and benchmarks (DB_TYPE=memory).
+class MemoryBackend(AnalyticsBackend):
+    name = 'memory'
+
+    def __init__(self):
+        self.views = {}
+        self.logs = []
+        self.rollup_rows = {HOURLY: {}, DAILY: {}}
+        self.state = {}
+        self._lock = threading.Lock()
+
+    def create_schema(self):
+        pass
+
+    def _add(self, document_name, count, now):
+        row = self.views.get(document_name)
+        if row is None:
+            row = self.views[document_name] = [0, now, now]
+        row[0] += count
+        row[1] = now
+        return row[0]
+
+    def _add_logs(self, logs):
+        self.logs.extend(logs)
+        for table, buckets in count_buckets(logs).items():
+            rows = self.rollup_rows[table]
+            for key, count in buckets.items():
+                views, visitors = rows.get(key, (0, 0))
+                rows[key] = (views + count, visitors)
+
+    def record_view(self, document_name, ip_hash, user_agent, now):
+        with self._lock:
+            self._add_logs([(document_name, ip_hash, user_agent, now)])
+            return self._add(document_name, 1, now)
+
+    def write_views(self, counts, last_viewed, logs):
+        with self._lock:
+            self._add_logs(logs)
+            return {name: self._add(name, count, last_viewed[name]) for name, count in counts.items()}
+
+    def view_count(self, document_name):
+        with self._lock:
+            row = self.views.get(document_name)
+            return row[0] if row else 0
+
+    def view_counts(self, names):
+        with self._lock:
+            return {name: self.views[name][0] for name in names if name in self.views}
+
+    def popular_documents(self, limit):
+        with self._lock:
+            rows = [(name, row[0], row[1]) for name, row in self.views.items() if row[0] > 0]
+        return heapq.nlargest(limit, rows, key=lambda row: row[1])
+
+    def document_count(self):
+        with self._lock:
+            return len(self.views)
+
+    def rollups(self, document_name, table, limit):
+        with self._lock:
+            rows = [(bucket, views, visitors) for (name, bucket), (views, visitors) in self.rollup_rows[table].items() if name == document_name]
+        return sorted(rows, reverse=True)[:limit]
+
+    def rolled_up_until(self):
+        value = self.state.get('rolled_up_until')
+        return date.fromisoformat(value) if value else None
+
+    def oldest_log_day(self):
+        with self._lock:
+            if not self.logs:
+                return None
+            return date.fromisoformat(min(log[3] for log in self.logs)[:10])
+
+    def rollup_day(self, day):
+        start, end = day.isoformat(), (day + timedelta(days=1)).isoformat()
+        with self._lock:
+            logs = [log for log in self.logs if start <= log[3] < end]
+            for table, bucket in ((HOURLY, hour_bucket), (DAILY, day_bucket)):
+                visitors = {}
+                for document_name, ip_hash, _, timestamp in logs:
+                    visitors.setdefault((document_name, bucket(timestamp)), []).append(ip_hash)
+                for key, ip_hashes in visitors.items():
+                    self.rollup_rows[table][key] = (len(ip_hashes), len(set(ip_hashes) - {None}))
+            self.state['rolled_up_until'] = end
+
+    def delete_logs_before(self, day, limit):
+        cutoff = day.isoformat()
+        with self._lock:
+            kept, deleted = [], 0
+            for log in self.logs:
+                if deleted < limit and log[3] < cutoff:
+                    deleted += 1
+                else:
+                    kept.append(log)
+            self.logs = kept
+        return deleted
+
+    def stats(self):
+        with self._lock:
+            return {'type': self.name, 'documents': len(self.views), 'logs': len(self.logs)}
+
+# Shared plumbing for the database backends: a connection pool, transactions
+# and the queries that are the same in every dialect apart from placeholders.
+class SQLBackend(AnalyticsBackend):
+    placeholder = '%s'
+    schema = ()
+    hour_bucket_sql = None
+    day_bucket_sql = None
+    rollup_conflict_sql = '''
+        ON CONFLICT (document_name, bucket)
+        DO UPDATE SET views = excluded.views, unique_visitors = excluded.unique_visitors
+    '''
+    delete_batch_sql = 'DELETE FROM view_logs WHERE id IN (SELECT id FROM view_logs WHERE timestamp < {p} LIMIT {p})'
+
+    def __init__(self, connect, pool_options=None):
+        self.pool = ConnectionPool(connect, check=self._check, reset=self._reset, **(pool_options or {}))
+
+    @staticmethod
+    def _check(conn):
+        cursor = conn.cursor()
+        cursor.execute('SELECT 1')
+        cursor.close()
+
+    @staticmethod
+    def _reset(conn):
+        conn.rollback()
+
+    def _begin(self, cursor):
+        pass
+
+    def _commit(self, conn, cursor):
+        conn.commit()
+
+    # Ends the implicit transaction a read opened, so a pooled connection
+    # doesn't sit idle in one or keep reading an old snapshot.
+    def _finish_read(self, conn):
+        conn.rollback()
+
+    def connect(self):
+        with self.pool.connection():
+            pass
+
+    # Errors propagate to the pool, which rolls the connection back with
+    # _reset before reusing it.
+    @contextmanager
+    def transaction(self):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            self._begin(cursor)
+            try:
+                yield cursor
+                self._commit(conn, cursor)
+            finally:
+                cursor.close()
+
+    @contextmanager
+    def read(self):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+                self._finish_read(conn)
+
+    def create_schema(self):
+        with self.transaction() as cursor:
+            for statement in self.schema:
+                cursor.execute(statement)
+
+    def view_count(self, document_name):
+        with self.read() as cursor:
+            cursor.execute(f'SELECT view_count FROM page_views WHERE document_name = {self.placeholder}', (document_name,))
+            result = cursor.fetchone()
+        return result[0] if result else 0
+
+    def view_counts(self, names):
+        with self.read() as cursor:
+            return self._read_totals(cursor, list(names))
+
+    def popular_documents(self, limit):
+        with self.read() as cursor:
+            cursor.execute(f'''
+                SELECT document_name, view_count, last_viewed
+                FROM page_views
+                WHERE view_count > 0
+                ORDER BY view_count DESC
+                LIMIT {self.placeholder}
+            ''', (limit,))
+            return cursor.fetchall()
+
+    def document_count(self):
+        with self.read() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM page_views')
+            return cursor.fetchone()[0]
+
+    def _read_totals(self, cursor, names):
+        totals = {}
+        for i in range(0, len(names), READ_CHUNK):
+            chunk = names[i:i + READ_CHUNK]
+            cursor.execute(f'''
+                SELECT document_name, view_count FROM page_views
+                WHERE document_name IN ({', '.join([self.placeholder] * len(chunk))})
+            ''', chunk)
+            totals.update(cursor.fetchall())
+        return totals
+
+    def _add_rollups(self, cursor, logs):
+        for table, buckets in count_buckets(logs).items():
+            rows = [(document_name, bucket, views, 0) for (document_name, bucket), views in sorted(buckets.items())]
+            if rows:
+                self._upsert_rollups(cursor, table, rows)
+
+    def _upsert_rollups(self, cursor, table, rows):
+        raise NotImplementedError
+
+    def rollups(self, document_name, table, limit):
+        p = self.placeholder
+        with self.read() as cursor:
+            cursor.execute(f'''
+                SELECT bucket, views, unique_visitors
+                FROM {table}
+                WHERE document_name = {p}
+                ORDER BY bucket DESC
+                LIMIT {p}
+            ''', (document_name, limit))
+            return cursor.fetchall()
+
+    def rolled_up_until(self):
+        with self.read() as cursor:
+            cursor.execute(f'SELECT value FROM analytics_state WHERE name = {self.placeholder}', ('rolled_up_until',))
+            row = cursor.fetchone()
+        return date.fromisoformat(row[0]) if row else None
+
+    def oldest_log_day(self):
+        with self.read() as cursor:
+            cursor.execute('SELECT MIN(timestamp) FROM view_logs')
+            oldest = cursor.fetchone()[0]
+        return date.fromisoformat(str(oldest)[:10]) if oldest else None
+
+    # Recounts the day's buckets from the raw logs, which the timestamp index
+    # narrows down, and moves the watermark in the same transaction.
+    def rollup_day(self, day):
+        p = self.placeholder
+        start, end = day.isoformat(), (day + timedelta(days=1)).isoformat()
+        with self.transaction() as cursor:
+            for table, bucket in ((HOURLY, self.hour_bucket_sql), (DAILY, self.day_bucket_sql)):
+                cursor.execute(f'''
+                    INSERT INTO {table} (document_name, bucket, views, unique_visitors)
+                    SELECT document_name, {bucket}, COUNT(*), COUNT(DISTINCT ip_hash)
+                    FROM view_logs
+                    WHERE timestamp >= {p} AND timestamp < {p}
+                    GROUP BY document_name, {bucket}
+                    {self.rollup_conflict_sql}
+                ''', (start, end))
+            cursor.execute(f'DELETE FROM analytics_state WHERE name = {p}', ('rolled_up_until',))
+            cursor.execute(f'INSERT INTO analytics_state (name, value) VALUES ({p}, {p})', ('rolled_up_until', end))
+
+    def delete_logs_before(self, day, limit):
+        with self.transaction() as cursor:
+            cursor.execute(self.delete_batch_sql.format(p=self.placeholder), (day.isoformat(), limit))
+            return cursor.rowcount
+
+    def close(self):
+        self.pool.close()
+
+    def stats(self):
+        return dict(self.pool.stats(), type=self.name)
+
+class SQLiteBackend(SQLBackend):
+    name = 'sqlite'
+    placeholder = '?'
+    schema = (
+        '''
+            CREATE TABLE IF NOT EXISTS page_views (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                document_name TEXT NOT NULL UNIQUE,
+                view_count INTEGER DEFAULT 0,
+                last_viewed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_view_count ON page_views(view_count DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_last_viewed ON page_views(last_viewed DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_document_name ON page_views(document_name)',
+        '''
+            CREATE TABLE IF NOT EXISTS view_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                document_name TEXT NOT NULL,
+                ip_hash TEXT,
+                user_agent TEXT,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_log_doc_name ON view_logs(document_name)',
+        'CREATE INDEX IF NOT EXISTS idx_log_timestamp ON view_logs(timestamp DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_log_ip_time ON view_logs(ip_hash, timestamp)'
+    ) + rollup_schema('TEXT', 'TEXT', 'TEXT')
+    hour_bucket_sql = "strftime('%Y-%m-%d %H:00:00', timestamp)"
+    day_bucket_sql = 'date(timestamp)'
+
+    def __init__(self, path, busy_timeout=30.0, pool_options=None):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        super().__init__(self._connect, pool_options)
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            isolation_level=None
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA cache_size=10000')
+        conn.execute('PRAGMA temp_store=memory')
+        return conn
+
+    @staticmethod
+    def _reset(conn):
+        if conn.in_transaction:
+            conn.rollback()
+
+    # The write lock is taken up front, so concurrent writers (threads or
+    # other worker processes) queue on the busy timeout instead of failing a
+    # lock upgrade halfway through.
+    def _begin(self, cursor):
+        cursor.execute('BEGIN IMMEDIATE')
+
+    def _commit(self, conn, cursor):
+        cursor.execute('COMMIT')
+
+    def _finish_read(self, conn):
+        pass
+
+    def is_busy(self, error):
+        return isinstance(error, sqlite3.OperationalError) and 'locked' in str(error)
+
+    def record_view(self, document_name, ip_hash, user_agent, now):
+        with self.transaction() as cursor:
+            cursor.execute(f'''
+                INSERT INTO page_views (document_name, view_count, last_viewed, created_at)
+                VALUES (?, 1, ?, ?)
+                ON CONFLICT (document_name)
+                DO UPDATE SET
+                    view_count = view_count + 1,
+                    last_viewed = excluded.last_viewed
+                {'RETURNING view_count' if SQLITE_RETURNING else ''}
+            ''', (document_name, now, now))
+            if not SQLITE_RETURNING:
+                cursor.execute('SELECT view_count FROM page_views WHERE document_name = ?', (document_name,))
+            result = cursor.fetchone()
+            cursor.execute('''
+                INSERT INTO view_logs (document_name, ip_hash, user_agent, timestamp)
+                VALUES (?, ?, ?, ?)
+            ''', (document_name, ip_hash, user_agent, now))
+            self._add_rollups(cursor, [(document_name, ip_hash, user_agent, now)])
+        return result[0] if result else 1
+
+    def write_views(self, counts, last_viewed, logs):
+        names = sorted(counts)
+        with self.transaction() as cursor:
+            cursor.executemany('''
+                INSERT INTO page_views (document_name, view_count, last_viewed, created_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (document_name)
+                DO UPDATE SET
+                    view_count = view_count + excluded.view_count,
+                    last_viewed = excluded.last_viewed
+            ''', [(name, counts[name], last_viewed[name], last_viewed[name]) for name in names])
+            cursor.executemany('''
+                INSERT INTO view_logs (document_name, ip_hash, user_agent, timestamp)
+                VALUES (?, ?, ?, ?)
+            ''', logs)
+            self._add_rollups(cursor, logs)
+            return self._read_totals(cursor, names)
+
+    def _upsert_rollups(self, cursor, table, rows):
+        cursor.executemany(f'''
+            INSERT INTO {table} (document_name, bucket, views, unique_visitors)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (document_name, bucket)
+            DO UPDATE SET views = views + excluded.views
+        ''', rows)
+
+class PostgresBackend(SQLBackend):
+    name = 'postgres'
+    default_port = 5432
+    schema = (
+        '''
+            CREATE TABLE IF NOT EXISTS page_views (
+                id SERIAL PRIMARY KEY,
+                document_name VARCHAR(255) NOT NULL UNIQUE,
+                view_count INTEGER DEFAULT 0,
+                last_viewed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_view_count ON page_views(view_count DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_last_viewed ON page_views(last_viewed DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_document_name ON page_views(document_name)',
+        '''
+            CREATE TABLE IF NOT EXISTS view_logs (
+                id SERIAL PRIMARY KEY,
+                document_name VARCHAR(255) NOT NULL,
+                ip_hash VARCHAR(64),
+                user_agent TEXT,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_log_doc_name ON view_logs(document_name)',
+        'CREATE INDEX IF NOT EXISTS idx_log_timestamp ON view_logs(timestamp DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_log_ip_time ON view_logs(ip_hash, timestamp)'
+    ) + rollup_schema('VARCHAR(255)', 'TIMESTAMP', 'DATE')
+    hour_bucket_sql = "date_trunc('hour', timestamp)"
+    day_bucket_sql = 'CAST(timestamp AS DATE)'
+
+    def __init__(self, params, pool_options=None):
+        self.host = params['host']
+        super().__init__(lambda: self._connect(params), pool_options)
+
+    @staticmethod
+    def _connect(params):
+        conn = psycopg2.connect(sslmode='require', connect_timeout=10, **params)
+        conn.autocommit = False
+        return conn
+
+    def record_view(self, document_name, ip_hash, user_agent, now):
+        with self.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO page_views (document_name, view_count, last_viewed, created_at)
+                VALUES (%s, 1, %s, %s)
+                ON CONFLICT (document_name)
+                DO UPDATE SET
+                    view_count = page_views.view_count + 1,
+                    last_viewed = EXCLUDED.last_viewed
+                RETURNING view_count
+            ''', (document_name, now, now))
+            result = cursor.fetchone()
+            cursor.execute('''
+                INSERT INTO view_logs (document_name, ip_hash, user_agent, timestamp)
+                VALUES (%s, %s, %s, %s)
+            ''', (document_name, ip_hash, user_agent, now))
+            self._add_rollups(cursor, [(document_name, ip_hash, user_agent, now)])
+        return result[0] if result else 1
+
+    # execute_values sends each page of rows as one multi-row statement, and
+    # RETURNING hands back the new totals without a second query.
+    def write_views(self, counts, last_viewed, logs):
+        names = sorted(counts)
+        with self.transaction() as cursor:
+            totals = psycopg2.extras.execute_values(cursor, '''
+                INSERT INTO page_views (document_name, view_count, last_viewed, created_at)
+                VALUES %s
+                ON CONFLICT (document_name)
+                DO UPDATE SET
+                    view_count = page_views.view_count + EXCLUDED.view_count,
+                    last_viewed = EXCLUDED.last_viewed
+                RETURNING document_name, view_count
+            ''', [(name, counts[name], last_viewed[name], last_viewed[name]) for name in names], page_size=READ_CHUNK, fetch=True)
+            psycopg2.extras.execute_values(cursor, '''
+                INSERT INTO view_logs (document_name, ip_hash, user_agent, timestamp)
+                VALUES %s
+            ''', logs, page_size=READ_CHUNK)
+            self._add_rollups(cursor, logs)
+        return dict(totals)
+
+    def _upsert_rollups(self, cursor, table, rows):
+        psycopg2.extras.execute_values(cursor, f'''
+            INSERT INTO {table} (document_name, bucket, views, unique_visitors)
+            VALUES %s
+            ON CONFLICT (document_name, bucket)
+            DO UPDATE SET views = {table}.views + EXCLUDED.views
+        ''', rows, page_size=READ_CHUNK)
+
+class MySQLBackend(SQLBackend):
+    name = 'mysql'
+    default_port = 3306
+    schema = (
+        '''
+            CREATE TABLE IF NOT EXISTS page_views (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                document_name VARCHAR(255) NOT NULL UNIQUE,
+                view_count INT DEFAULT 0,
+                last_viewed DATETIME(6) DEFAULT CURRENT_TIMESTAMP(6),
+                created_at DATETIME(6) DEFAULT CURRENT_TIMESTAMP(6),
+                INDEX idx_view_count (view_count),
+                INDEX idx_last_viewed (last_viewed)
+            ) CHARACTER SET utf8mb4
+        ''',
+        '''
+            CREATE TABLE IF NOT EXISTS view_logs (
+                id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                document_name VARCHAR(255) NOT NULL,
+                ip_hash VARCHAR(64),
+                user_agent TEXT,
+                timestamp DATETIME(6) DEFAULT CURRENT_TIMESTAMP(6),
+                INDEX idx_log_doc_name (document_name),
+                INDEX idx_log_timestamp (timestamp),
+                INDEX idx_log_ip_time (ip_hash, timestamp)
+            ) CHARACTER SET utf8mb4
+        '''
+    ) + rollup_schema('VARCHAR(255)', 'DATETIME', 'DATE', ' CHARACTER SET utf8mb4')
+    hour_bucket_sql = 'TIMESTAMP(DATE(timestamp), MAKETIME(HOUR(timestamp), 0, 0))'
+    day_bucket_sql = 'DATE(timestamp)'
+    rollup_conflict_sql = '''
+        ON DUPLICATE KEY UPDATE views = VALUES(views), unique_visitors = VALUES(unique_visitors)
+    '''
+    # MySQL can't LIMIT a subquery used with IN, but DELETE takes LIMIT itself.
+    delete_batch_sql = 'DELETE FROM view_logs WHERE timestamp < {p} LIMIT {p}'
+
+    def __init__(self, params, pool_options=None):
+        if pymysql is None:
+            raise RuntimeError("PyMySQL is not installed")
+        self.host = params['host']
+        super().__init__(lambda: self._connect(params), pool_options)
+
+    @staticmethod
+    def _connect(params):
+        return pymysql.connect(
+            host=params['host'],
+            port=params['port'],
+            user=params['user'],
+            password=params['password'],
+            database=params['database'],
+            charset='utf8mb4',
+            connect_timeout=10,
+            autocommit=False
+        )
+
+    # MySQL has no RETURNING: LAST_INSERT_ID(expr) passes the new count back
+    # through lastrowid, and an upsert that updated reports two affected rows.
+    def record_view(self, document_name, ip_hash, user_agent, now):
+        with self.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO page_views (document_name, view_count, last_viewed, created_at)
+                VALUES (%s, 1, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    view_count = LAST_INSERT_ID(view_count + 1),
+                    last_viewed = VALUES(last_viewed)
+            ''', (document_name, now, now))
+            view_count = cursor.lastrowid if cursor.rowcount == 2 else 1
+            cursor.execute('''
+                INSERT INTO view_logs (document_name, ip_hash, user_agent, timestamp)
+                VALUES (%s, %s, %s, %s)
+            ''', (document_name, ip_hash, user_agent, now))
+            self._add_rollups(cursor, [(document_name, ip_hash, user_agent, now)])
+        return view_count
+
+    # PyMySQL's executemany rewrites a single-row INSERT ... VALUES into
+    # multi-row statements, ON DUPLICATE KEY clause included.
+    def write_views(self, counts, last_viewed, logs):
+        names = sorted(counts)
+        with self.transaction() as cursor:
+            cursor.executemany('''
+                INSERT INTO page_views (document_name, view_count, last_viewed, created_at)
+                VALUES (%s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    view_count = view_count + VALUES(view_count),
+                    last_viewed = VALUES(last_viewed)
+            ''', [(name, counts[name], last_viewed[name], last_viewed[name]) for name in names])
+            cursor.executemany('''
+                INSERT INTO view_logs (document_name, ip_hash, user_agent, timestamp)
+                VALUES (%s, %s, %s, %s)
+            ''', logs)
+            self._add_rollups(cursor, logs)
+            return self._read_totals(cursor, names)
+
+    def _upsert_rollups(self, cursor, table, rows):
+        cursor.executemany(f'''
+            INSERT INTO {table} (document_name, bucket, views, unique_visitors)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE views = views + VALUES(views)
+        ''', rows)
@@ -0,0 +1,58 @@
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from api.config import DOCS_DIR
+from api.utils.documents import get_all_documents
+from api.utils.markdown import convert_markdown_to_html, get_render_cache_key
+from api.utils.render_cache import render_cache
+
+logger = logging.getLogger(__name__)
+
+def _render_document(item):
+    name, md_content, drop_first_h1 = item
+    start = time.perf_counter()
+    html = convert_markdown_to_html(md_content, drop_first_h1=drop_first_h1)
+    return {
+        'name': name,
+        'html': html,
+        'seconds': time.perf_counter() - start,
+        'pid': os.getpid()
+    }
+
+def load_markdown_documents(names=None):
+    documents = []
+    for doc in get_all_documents():
+        if doc.get('is_virtual') or (names is not None and doc['filename'] not in names):
+            continue
+        md_path = os.path.join(DOCS_DIR, *doc['filename'].split('/')) + '.md'
+        if os.path.exists(md_path):
+            with open(md_path, 'r', encoding='utf-8') as f:
+                documents.append((doc['filename'], f.read()))
+    return sorted(documents)
+
+def render_documents(documents, jobs=None, chunksize=None, drop_first_h1=True):
+    items = [(name, md_content, drop_first_h1) for name, md_content in sorted(documents)]
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    start = time.perf_counter()
+
+    if jobs == 1 or len(items) <= 1:
+        results = [_render_document(item) for item in items]
+    else:
+        chunksize = chunksize or max(1, len(items) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_render_document, items, chunksize=chunksize))
+
+        for (name, md_content, _), result in zip(items, results):
+            render_cache.put(get_render_cache_key(md_content, drop_first_h1), result['html'])
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Rendered {len(results)} documents with {jobs} job(s) in {elapsed:.2f}s")
+    return results
+
+def warm_render_cache(jobs=None, names=None):
+    return render_documents(load_markdown_documents(names), jobs=jobs)
+
+def summarize_timings(results, limit=10):
+    slowest = sorted(results, key=lambda result: result['seconds'], reverse=True)[:limit]
+    return [(result['name'], result['seconds']) for result in slowest]
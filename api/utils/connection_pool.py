@@ -0,0 +1,211 @@
+import os
+import time
+import threading
+import logging
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+class PoolTimeout(Exception):
+    pass
+
+class ConnectionPool:
+    def __init__(self, connect, max_size=10, timeout=5.0, idle_timeout=300.0, max_lifetime=3600.0, check_after=30.0, check=None, reset=None):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        self.check = check
+        self.reset = reset
+        self._idle = deque()
+        self._created_at = {}
+        self._size = 0
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+        self.created = 0
+        self.closed = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.failed_checks = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    # Connections are only health-checked when they sat idle for longer than
+    # check_after; anything idle past idle_timeout or older than max_lifetime
+    # is closed instead of being handed out.
+    @contextmanager
+    def connection(self):
+        conn = self.checkout()
+        broken = False
+        try:
+            yield conn
+        except Exception:
+            broken = not self._reset(conn)
+            raise
+        finally:
+            self.checkin(conn, broken)
+
+    def checkout(self):
+        self._check_fork()
+        start = time.monotonic()
+        deadline = start + self.timeout
+
+        while True:
+            entry, check = self._reserve(start, deadline)
+            if entry is None:
+                break
+            # The health check is a round trip to the server, so it runs with
+            # the slot reserved but the lock released.
+            if check and not self._healthy(entry[0]):
+                continue
+            break
+
+        if entry is None:
+            try:
+                conn = self.connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self.created += 1
+            entry = (conn, time.monotonic())
+
+        conn, created_at = entry
+        with self._cond:
+            self.checkouts += 1
+            self._created_at[id(conn)] = created_at
+        return conn
+
+    # Returns an idle connection (and whether it needs a health check) or
+    # (None, False) after reserving room for a new one.
+    def _reserve(self, start, deadline):
+        waited = False
+        with self._cond:
+            while True:
+                entry, check = self._take_idle()
+                if entry is not None:
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(f"No connection available within {self.timeout}s ({self.max_size} in use)")
+                waited = True
+                self._cond.wait(remaining)
+
+            if waited:
+                waited_for = time.monotonic() - start
+                self.waits += 1
+                self.wait_seconds += waited_for
+                self.max_wait_seconds = max(self.max_wait_seconds, waited_for)
+            return entry, check
+
+    def _healthy(self, conn):
+        try:
+            self.check(conn)
+            return True
+        except Exception as e:
+            logger.info(f"Dropping pooled connection that failed its health check: {e}")
+            try:
+                conn.close()
+            except Exception:
+                pass
+            with self._cond:
+                self._size -= 1
+                self.closed += 1
+                self.failed_checks += 1
+                self._cond.notify()
+            return False
+
+    def checkin(self, conn, broken=False):
+        with self._cond:
+            created_at = self._created_at.pop(id(conn), time.monotonic())
+        now = time.monotonic()
+        if broken or now - created_at > self.max_lifetime or os.getpid() != self._pid:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, created_at, now))
+            self._cond.notify()
+
+    def _take_idle(self):
+        # Newest first, so a quiet period lets the oldest idle connections
+        # age out instead of cycling through all of them.
+        now = time.monotonic()
+        while self._idle:
+            conn, created_at, idle_since = self._idle.pop()
+            if now - idle_since > self.idle_timeout or now - created_at > self.max_lifetime:
+                self._close_locked(conn)
+                continue
+            self._evict_idle(now)
+            return (conn, created_at), self.check is not None and now - idle_since > self.check_after
+        return None, False
+
+    def _evict_idle(self, now):
+        while self._idle and now - self._idle[0][2] > self.idle_timeout:
+            conn, _, _ = self._idle.popleft()
+            self._close_locked(conn)
+
+    def _reset(self, conn):
+        if self.reset is None:
+            return True
+        try:
+            self.reset(conn)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        with self._cond:
+            self._close_locked(conn)
+            self._cond.notify()
+
+    def _close_locked(self, conn):
+        self._size -= 1
+        self.closed += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    # A forked worker must not share sockets or SQLite handles with its
+    # parent, so it starts from an empty pool.
+    def _check_fork(self):
+        if os.getpid() != self._pid:
+            with self._cond:
+                if os.getpid() != self._pid:
+                    self._idle.clear()
+                    self._created_at.clear()
+                    self._size = 0
+                    self._pid = os.getpid()
+
+    def close(self):
+        with self._cond:
+            while self._idle:
+                conn, _, _ = self._idle.popleft()
+                self._close_locked(conn)
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'max_size': self.max_size,
+                'in_use': self._size - len(self._idle),
+                'idle': len(self._idle),
+                'created': self.created,
+                'closed': self.closed,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'failed_checks': self.failed_checks,
+                'avg_wait_ms': round(self.wait_seconds / self.waits * 1000, 2) if self.waits else 0.0,
+                'max_wait_ms': round(self.max_wait_seconds * 1000, 2)
+            }
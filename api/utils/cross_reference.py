@@ -1,21 +1,85 @@
 import re
+import hashlib
+import threading
+import logging
+from api.config import CROSS_REFERENCE_ALIASES
 from api.utils.documents import get_all_documents
 
-def process_cross_references(content):
+logger = logging.getLogger(__name__)
+
+REFERENCE_PATTERN = re.compile(r'\[\[([^\]]+)\]\]')
+
+def find_references(content):
+    return sorted(set(REFERENCE_PATTERN.findall(content)))
+
+class CrossReferenceResolver:
+    def __init__(self, documents, aliases=None):
+        self.titles = {doc['filename']: doc['title'] for doc in documents}
+
+        # The first document with a given title wins, as with the linear scan
+        # this index replaces.
+        self.folded_titles = {}
+        for filename, title in self.titles.items():
+            self.folded_titles.setdefault(title.casefold(), (filename, title))
+
+        self.aliases = {}
+        for alias, filename in (aliases or {}).items():
+            if filename in self.titles:
+                self.aliases[alias.casefold()] = (filename, self.titles[filename])
+            else:
+                logger.warning(f"Cross-reference alias '{alias}' points to unknown document '{filename}'")
+
+    def resolve(self, ref_text):
+        title = self.titles.get(ref_text)
+        if title is not None:
+            return ref_text, title
+
+        folded = ref_text.casefold()
+        return self.folded_titles.get(folded) or self.aliases.get(folded)
+
+    def resolve_many(self, references):
+        return {ref_text: self.resolve(ref_text) for ref_text in references}
+
+_resolver = (None, None)
+_resolver_lock = threading.Lock()
+
+def get_resolver():
+    global _resolver
     documents = get_all_documents()
-    doc_titles = {doc['filename']: doc['title'] for doc in documents}
-    
-    def replace_reference(match):
-        ref_text = match.group(1)
-        
-        if ref_text in doc_titles:
-            return f'<a href="/{ref_text}" class="cross-reference">{doc_titles[ref_text]}</a>'
-        
-        for filename, title in doc_titles.items():
-            if title.lower() == ref_text.lower():
-                return f'<a href="/{filename}" class="cross-reference">{title}</a>'
-        
+
+    resolver = _resolver
+    if resolver[0] is not documents:
+        with _resolver_lock:
+            if _resolver[0] is not documents:
+                _resolver = (documents, CrossReferenceResolver(documents, CROSS_REFERENCE_ALIASES))
+            resolver = _resolver
+
+    return resolver[1]
+
+def get_reference_signature(content):
+    references = find_references(content)
+    if not references:
+        return ''
+
+    digest = hashlib.sha256()
+    for ref_text, resolved in get_resolver().resolve_many(references).items():
+        digest.update(f"{ref_text}\0{resolved}\n".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def render_reference(ref_text, resolved):
+    if resolved is None:
         return f'<span class="broken-reference">[[{ref_text}]]</span>'
-    
-    pattern = r'\[\[([^\]]+)\]\]'
-    return re.sub(pattern, replace_reference, content)
\ No newline at end of file
+
+    filename, title = resolved
+    return f'<a href="/{filename}" class="cross-reference">{title}</a>'
+
+def process_cross_references(content):
+    references = find_references(content)
+    if not references:
+        return content
+
+    links = {
+        ref_text: render_reference(ref_text, resolved)
+        for ref_text, resolved in get_resolver().resolve_many(references).items()
+    }
+    return REFERENCE_PATTERN.sub(lambda match: links[match.group(1)], content)
@@ -0,0 +1,86 @@
+import threading
+from api.config import CROSS_REFERENCE_ALIASES
+from api.utils.cross_reference import find_references
+
+def reference_key(ref_text):
+    return f"ref:{ref_text.casefold()}"
+
+def directory_key(path):
+    return f"dir:{path}"
+
+def get_parent_path(filename):
+    return filename.rsplit('/', 1)[0] if '/' in filename else ''
+
+# A rendered page depends on what its [[references]] resolve to and on the
+# listings it shows: its own subdocuments, its siblings and the sidebar of its
+# top-level folder.
+def get_document_dependencies(template_name, md_content):
+    keys = {reference_key(ref_text) for ref_text in find_references(md_content)}
+    keys.add(directory_key(template_name))
+    if '/' in template_name:
+        keys.add(directory_key(get_parent_path(template_name)))
+        keys.add(directory_key(template_name.split('/')[0]))
+    return keys
+
+# Keys touched when a document is added, removed or retitled. Filenames and
+# titles are both folded, which may over-invalidate but never misses a page.
+def get_change_keys(filename, old_title=None, new_title=None):
+    keys = {reference_key(filename), directory_key(get_parent_path(filename))}
+    keys.update(reference_key(alias) for alias, target in CROSS_REFERENCE_ALIASES.items() if target == filename)
+    for title in (old_title, new_title):
+        if title:
+            keys.add(reference_key(title))
+    return keys
+
+def diff_catalogs(old_titles, new_titles):
+    changes = []
+    for filename in sorted(set(old_titles) | set(new_titles)):
+        old_title = old_titles.get(filename)
+        new_title = new_titles.get(filename)
+        if old_title != new_title:
+            changes.append((filename, old_title, new_title))
+    return changes
+
+class DependencyGraph:
+    def __init__(self):
+        self._dependencies = {}
+        self._dependents = {}
+        self._lock = threading.Lock()
+
+    def record(self, document, keys):
+        with self._lock:
+            self._forget(document)
+            self._dependencies[document] = frozenset(keys)
+            for key in self._dependencies[document]:
+                self._dependents.setdefault(key, set()).add(document)
+
+    def _forget(self, document):
+        for key in self._dependencies.pop(document, ()):
+            dependents = self._dependents.get(key)
+            if dependents is not None:
+                dependents.discard(document)
+                if not dependents:
+                    del self._dependents[key]
+
+    def dependents(self, keys):
+        with self._lock:
+            documents = set()
+            for key in keys:
+                documents.update(self._dependents.get(key, ()))
+            return documents
+
+    def affected_by(self, changes):
+        keys = set()
+        documents = set()
+        for filename, old_title, new_title in changes:
+            keys.update(get_change_keys(filename, old_title, new_title))
+            if filename in self._dependencies:
+                documents.add(filename)
+        return documents | self.dependents(keys)
+
+    @classmethod
+    def from_manifest(cls, manifest):
+        graph = cls()
+        for document, entry in manifest.get('documents', {}).items():
+            graph.record(document, entry.get('dependencies', []))
+        return graph
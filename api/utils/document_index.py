@@ -0,0 +1,356 @@
+import os
+import io
+import json
+import time
+import hashlib
+import threading
+import logging
+from api.config import DOCS_DIR, CATALOG_CONFIG
+from api.utils import inotify
+
+logger = logging.getLogger(__name__)
+
+EXCLUDED_TEMPLATES = ['index.html', 'markdown_base.html', 'error.html', 'print.html']
+
+MANIFEST_VERSION = 1
+
+def get_order_from_filename(filename):
+    parts = filename.split('_', 1)
+    if len(parts) > 1 and parts[0].isdigit():
+        return int(parts[0])
+    return 999
+
+def is_document_file(item):
+    return item.endswith('.md') or (item.endswith('.html') and item not in EXCLUDED_TEMPLATES)
+
+def read_content_hash(item_path):
+    with open(item_path, 'rb') as file:
+        content = file.read()
+    return content, hashlib.sha256(content).hexdigest()
+
+def load_document(item, parent_path, content):
+    if item.endswith('.html'):
+        filename = item.replace('.html', '')
+        title = filename.replace('_', ' ').title()
+    else:
+        filename = item.replace('.md', '')
+        title = filename.replace('_', ' ').title()
+        try:
+            first_line = io.StringIO(content.decode('utf-8'), newline=None).readline().strip()
+            if first_line.startswith('# '):
+                title = first_line[2:].strip()
+        except Exception:
+            pass
+
+    full_path = f"{parent_path}/{filename}" if parent_path else filename
+    return {
+        'filename': full_path,
+        'title': title,
+        'category': "Documentation",
+        'is_subdoc': bool(parent_path),
+        'parent': parent_path if parent_path else None,
+        'recently_updated': False,
+        'order': get_order_from_filename(filename)
+    }
+
+def build_document_list(records):
+    documents = list(records)
+
+    folder_names = set()
+    for doc in documents:
+        if doc['is_subdoc'] and doc['parent']:
+            folder_names.add(doc['parent'])
+
+    existing_parents = set(doc['filename'] for doc in documents if not doc['is_subdoc'])
+
+    for folder_name in folder_names:
+        if folder_name not in existing_parents:
+            documents.append({
+                'filename': folder_name,
+                'title': folder_name.split('/')[-1].replace('_', ' ').title(),
+                'category': "Documentation",
+                'is_subdoc': False,
+                'parent': None,
+                'recently_updated': False,
+                'order': 999,
+                'is_virtual': True
+            })
+
+    return sorted(documents, key=lambda x: (x['category'], x['title']))
+
+class DocumentIndex:
+    def __init__(self, docs_dir, poll_interval=2.0, use_inotify=True, manifest_path=None):
+        self.docs_dir = docs_dir
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.manifest_path = manifest_path
+        self.revision = 0
+        self.files_read = 0
+        self._manifest = {}
+        self._manifest_dirty = False
+        self._files = {}
+        self._dirs = {}
+        self._watches = {}
+        self._watched = set()
+        self._inotify = None
+        self._documents = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    # Changes are picked up from inotify events when available, otherwise by
+    # stat polling at most once per poll_interval (a negative interval turns
+    # polling off). Each change publishes a new list and bumps the revision.
+    def documents(self):
+        with self._lock:
+            if self._documents is None:
+                self._full_scan()
+                self._publish()
+            elif self._inotify is not None:
+                if self._apply_events():
+                    self._publish()
+            elif self.poll_interval >= 0 and time.monotonic() - self._checked_at >= self.poll_interval:
+                self._checked_at = time.monotonic()
+                if self._poll():
+                    self._publish()
+            return self._documents
+
+    def refresh(self, full=False):
+        with self._lock:
+            if full or self._documents is None:
+                self._full_scan()
+                changed = True
+            elif self._inotify is not None:
+                changed = self._apply_events()
+            else:
+                changed = self._poll()
+            if changed:
+                self._publish()
+            return self._documents
+
+    def modified_times(self):
+        with self._lock:
+            return {record['filename']: mtime_ns for mtime_ns, _, _, record in self._files.values()}
+
+    def stats(self):
+        return {
+            'revision': self.revision,
+            'files': len(self._files),
+            'directories': len(self._dirs),
+            'files_read': self.files_read,
+            'mode': 'inotify' if self._inotify is not None else ('poll' if self.poll_interval >= 0 else 'static')
+        }
+
+    def _publish(self):
+        self._documents = build_document_list(record for _, _, _, record in self._files.values())
+        self.revision += 1
+        self._checked_at = time.monotonic()
+        if self._manifest_dirty:
+            self._save_manifest()
+            self._manifest_dirty = False
+
+    def _relative_path(self, path):
+        return path[len(self.docs_dir) + 1:].replace(os.sep, '/')
+
+    # The manifest maps each document's path relative to docs_dir to its mtime,
+    # size, content hash and parsed entry, so a cold start only re-reads files
+    # whose mtime or size changed, and skips re-parsing when the hash matches.
+    def _load_manifest(self):
+        if not self.manifest_path:
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_VERSION:
+                return manifest['files']
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable catalog manifest: {e}")
+        return {}
+
+    def _save_manifest(self):
+        if not self.manifest_path:
+            return
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'files': {
+                self._relative_path(path): [mtime_ns, size, digest, record]
+                for path, (mtime_ns, size, digest, record) in self._files.items()
+            }
+        }
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(manifest, separators=(',', ':')))
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            logger.debug(f"Could not write catalog manifest: {e}")
+
+    def _full_scan(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        self._files.clear()
+        self._dirs.clear()
+        self._watches.clear()
+        self._watched.clear()
+
+        if not os.path.exists(self.docs_dir):
+            os.makedirs(self.docs_dir)
+        self._manifest = self._load_manifest()
+
+        if self.use_inotify and inotify.is_available():
+            try:
+                self._inotify = inotify.Inotify()
+            except OSError as e:
+                logger.warning(f"inotify unavailable, falling back to polling: {e}")
+
+        self._scan_dir(self.docs_dir)
+        self._manifest = {}
+        return True
+
+    def _watch(self, dir_path):
+        if self._inotify is None or dir_path in self._watched:
+            return
+        try:
+            self._watches[self._inotify.add_watch(dir_path)] = dir_path
+            self._watched.add(dir_path)
+        except OSError as e:
+            logger.warning(f"Could not watch {dir_path}, falling back to polling: {e}")
+            self._inotify.close()
+            self._inotify = None
+            self._watches.clear()
+            self._watched.clear()
+
+    def _scan_dir(self, dir_path):
+        self._watch(dir_path)
+        try:
+            mtime = os.stat(dir_path).st_mtime_ns
+            with os.scandir(dir_path) as it:
+                entries = list(it)
+        except FileNotFoundError:
+            return self._remove_dir(dir_path)
+
+        rescan = dir_path in self._dirs
+        self._dirs[dir_path] = mtime
+        changed = False
+        seen = set()
+        for entry in entries:
+            seen.add(entry.path)
+            if entry.is_file():
+                if entry.path not in self._files and is_document_file(entry.name):
+                    changed |= self._sync_file(entry.path, entry.stat())
+            elif entry.is_dir() and entry.path not in self._dirs:
+                changed |= self._scan_dir(entry.path)
+
+        if rescan:
+            for path in [path for path in self._files if os.path.dirname(path) == dir_path and path not in seen]:
+                changed |= self._remove_file(path)
+            for path in [path for path in self._dirs if os.path.dirname(path) == dir_path and path not in seen]:
+                changed |= self._remove_dir(path)
+        return changed
+
+    def _sync_file(self, path, stat=None):
+        dir_path, item = os.path.split(path)
+        if not is_document_file(item):
+            return False
+        try:
+            stat = stat or os.stat(path)
+        except FileNotFoundError:
+            return self._remove_file(path)
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        known = self._files.get(path)
+        if known is None:
+            known = self._manifest.get(self._relative_path(path))
+            if known is not None and tuple(known[:2]) == signature:
+                self._files[path] = (signature[0], signature[1], known[2], known[3])
+                return True
+        elif known[:2] == signature:
+            return False
+
+        try:
+            content, digest = read_content_hash(path)
+        except FileNotFoundError:
+            return self._remove_file(path)
+        self.files_read += 1
+        self._manifest_dirty = True
+
+        if known is not None and known[2] == digest:
+            changed = path not in self._files
+            self._files[path] = (signature[0], signature[1], digest, known[3])
+            return changed
+
+        record = load_document(item, self._relative_path(dir_path), content)
+        self._files[path] = (signature[0], signature[1], digest, record)
+        return True
+
+    def _remove_file(self, path):
+        removed = self._files.pop(path, None) is not None
+        self._manifest_dirty |= removed
+        return removed
+
+    def _remove_dir(self, dir_path):
+        prefix = dir_path + os.sep
+        removed = [path for path in self._files if path.startswith(prefix)]
+        for path in removed:
+            del self._files[path]
+        self._manifest_dirty |= bool(removed)
+        for path in [path for path in self._dirs if path == dir_path or path.startswith(prefix)]:
+            del self._dirs[path]
+        for wd in [wd for wd, path in self._watches.items() if path == dir_path or path.startswith(prefix)]:
+            self._watched.discard(self._watches.pop(wd))
+            self._inotify.rm_watch(wd)
+        return bool(removed)
+
+    def _poll(self):
+        changed = False
+        for dir_path, mtime in list(self._dirs.items()):
+            if dir_path not in self._dirs:
+                continue
+            try:
+                current = os.stat(dir_path).st_mtime_ns
+            except FileNotFoundError:
+                changed |= self._remove_dir(dir_path)
+                continue
+            if current != mtime:
+                changed |= self._scan_dir(dir_path)
+
+        for path in list(self._files):
+            changed |= self._sync_file(path)
+        return changed
+
+    def _apply_events(self):
+        changed = False
+        for wd, mask, name in self._inotify.read_events():
+            if mask & inotify.IN_Q_OVERFLOW:
+                logger.warning("inotify queue overflowed, rescanning documents")
+                return self._full_scan()
+
+            dir_path = self._watches.get(wd)
+            if dir_path is None:
+                continue
+            if mask & inotify.IN_IGNORED:
+                self._watched.discard(self._watches.pop(wd))
+                continue
+            if mask & (inotify.IN_DELETE_SELF | inotify.IN_MOVE_SELF):
+                changed |= self._remove_dir(dir_path)
+                continue
+
+            path = os.path.join(dir_path, name)
+            if mask & inotify.IN_ISDIR:
+                if mask & (inotify.IN_CREATE | inotify.IN_MOVED_TO):
+                    changed |= self._scan_dir(path)
+                elif mask & (inotify.IN_DELETE | inotify.IN_MOVED_FROM):
+                    changed |= self._remove_dir(path)
+            else:
+                changed |= self._sync_file(path)
+        return changed
+
+document_index = DocumentIndex(
+    DOCS_DIR,
+    CATALOG_CONFIG['poll_interval'],
+    CATALOG_CONFIG['inotify'],
+    CATALOG_CONFIG['manifest'] or None
+)
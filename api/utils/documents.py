@@ -1,147 +1,98 @@
-import os
-import functools
-from api.utils.github_utils import is_recently_updated
+import hashlib
+from api.utils.document_index import document_index, get_order_from_filename
+from api.utils.recent_updates import recent_updates
 
-@functools.lru_cache(maxsize=128)
 def get_all_documents():
     try:
-        documents = []
-        docs_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates', 'docs')
-        
-        if not os.path.exists(docs_dir):
-            os.makedirs(docs_dir)
-            return []
-        
-        def scan_directory(current_dir, parent_path=""):
-            for item in os.listdir(current_dir):
-                item_path = os.path.join(current_dir, item)
-                
-                if os.path.isfile(item_path):
-                    if item.endswith('.html') and item not in ['index.html', 'markdown_base.html', 'error.html', 'print.html']:
-                        filename = item.replace('.html', '')
-                        full_path = f"{parent_path}/{filename}" if parent_path else filename
-                        category = "Documentation"
-                        documents.append({
-                            'filename': full_path,
-                            'title': filename.replace('_', ' ').title(),
-                            'category': category,
-                            'is_subdoc': bool(parent_path),
-                            'parent': parent_path if parent_path else None,
-                            'recently_updated': is_recently_updated(full_path),
-                            'order': get_order_from_filename(filename)
-                        })
-                    elif item.endswith('.md'):
-                        filename = item.replace('.md', '')
-                        full_path = f"{parent_path}/{filename}" if parent_path else filename
-                        title = filename.replace('_', ' ').title()
-                        category = "Documentation"
-                        
-                        try:
-                            with open(item_path, 'r', encoding='utf-8') as file:
-                                first_line = file.readline().strip()
-                                if first_line.startswith('# '):
-                                    title = first_line[2:].strip()
-                        except Exception:
-                            pass
-                        
-                        documents.append({
-                            'filename': full_path,
-                            'title': title,
-                            'category': category,
-                            'is_subdoc': bool(parent_path),
-                            'parent': parent_path if parent_path else None,
-                            'recently_updated': is_recently_updated(full_path),
-                            'order': get_order_from_filename(filename)
-                        })
-                
-                elif os.path.isdir(item_path):
-                    new_parent = f"{parent_path}/{item}" if parent_path else item
-                    scan_directory(item_path, new_parent)
-        
-        scan_directory(docs_dir)
-     
-        folder_names = set()
-        for doc in documents:
-            if doc['is_subdoc'] and doc['parent']:
-                folder_names.add(doc['parent'])
-        
-        existing_parents = set(doc['filename'] for doc in documents if not doc['is_subdoc'])
-        
-        for folder_name in folder_names:
-            if folder_name not in existing_parents:
-                category = "Documentation"
-                documents.append({
-                    'filename': folder_name,
-                    'title': folder_name.split('/')[-1].replace('_', ' ').title(),
-                    'category': category,
-                    'is_subdoc': False,
-                    'parent': None,
-                    'recently_updated': False,
-                    'order': 999,
-                    'is_virtual': True
-                })
-        
-        return sorted(documents, key=lambda x: (x['category'], x['title']))
-        
+        return recent_updates.apply(document_index.documents())
     except Exception as e:
         print(f"Error getting documents: {str(e)}")
         return []
 
-def get_order_from_filename(filename):
-    parts = filename.split('_', 1)
-    if len(parts) > 1 and parts[0].isdigit():
-        return int(parts[0])
-    return 999
+def refresh_documents(full=False):
+    return document_index.refresh(full)
 
-def get_categories():
+def get_catalog_revision():
+    return document_index.revision
+
+class DocumentCatalog:
+    def __init__(self, documents):
+        self.documents = documents
+        self.by_filename = {}
+        self.children = {}
+        self.categories = {}
+
+        digest = hashlib.sha256()
+        for doc in documents:
+            self.by_filename.setdefault(doc['filename'], doc)
+            self.children.setdefault(doc.get('parent'), []).append(doc)
+            self.categories.setdefault(doc.get('category', 'Documentation'), []).append(doc)
+            digest.update(f"{doc['filename']}\0{doc['title']}\n".encode('utf-8'))
+        self.version = digest.hexdigest()[:16]
+        self.titles = {doc['filename']: doc['title'] for doc in documents}
+        self.category_names = sorted({doc['category'] for doc in documents if doc.get('category')})
+
+        # Children keep catalog order; the ordered view is a stable sort on
+        # 'order', so ties resolve exactly as the old per-call sorts did.
+        self.ordered_children = {
+            parent: sorted(children, key=lambda x: x['order'])
+            for parent, children in self.children.items()
+        }
+        self.siblings = {}
+        for parent, children in self.ordered_children.items():
+            if parent is None:
+                continue
+            for i, doc in enumerate(children):
+                prev_doc = children[i - 1] if i > 0 else None
+                next_doc = children[i + 1] if i < len(children) - 1 else None
+                self.siblings.setdefault(doc['filename'], (prev_doc, next_doc))
+
+    def get(self, filename):
+        return self.by_filename.get(filename)
+
+    def subdocuments(self, parent_path):
+        return list(self.children.get(parent_path, ()))
+
+    def first_subdocument(self, parent_path):
+        children = self.ordered_children.get(parent_path)
+        return children[0] if children else None
+
+    def sibling_navigation(self, doc_path):
+        if '/' not in doc_path:
+            return None, None
+        return self.siblings.get(doc_path, (None, None))
+
+    def by_category(self):
+        return {category: list(docs) for category, docs in self.categories.items()}
+
+_catalog = (None, None)
+
+def get_catalog():
+    global _catalog
     documents = get_all_documents()
-    categories = set()
-    
-    for doc in documents:
-        if doc.get('category'):
-            categories.add(doc['category'])
-    
-    return sorted(list(categories))
+
+    if _catalog[0] is not documents:
+        _catalog = (documents, DocumentCatalog(documents))
+
+    return _catalog[1]
+
+def get_catalog_version():
+    return get_catalog().version
+
+def get_catalog_titles():
+    return get_catalog().titles
+
+def get_categories():
+    return list(get_catalog().category_names)
 
 def get_documents_by_category():
-    documents = get_all_documents()
-    categorized = {}
-    
-    for doc in documents:
-        category = doc.get('category', 'Documentation') 
-        if category not in categorized:
-            categorized[category] = []
-        categorized[category].append(doc)
-    
-    return categorized
+    return get_catalog().by_category()
 
 def get_subdocuments(parent_path):
-    documents = get_all_documents()
-    return [doc for doc in documents if doc.get('parent') == parent_path]
+    return get_catalog().subdocuments(parent_path)
 
 def get_first_subdocument(parent_path):
-    subdocs = get_subdocuments(parent_path)
-    if subdocs:
-        return min(subdocs, key=lambda x: x['order'])
-    return None
+    return get_catalog().first_subdocument(parent_path)
 
 def get_sibling_navigation(doc_path):
-    if '/' not in doc_path:
-        return None, None
-    
-    parent_path = '/'.join(doc_path.split('/')[:-1])
-    subdocs = sorted(get_subdocuments(parent_path), key=lambda x: x['order'])
-    
-    current_index = None
-    for i, doc in enumerate(subdocs):
-        if doc['filename'] == doc_path:
-            current_index = i
-            break
-    
-    if current_index is None:
-        return None, None
-    
-    prev_doc = subdocs[current_index - 1] if current_index > 0 else None
-    next_doc = subdocs[current_index + 1] if current_index < len(subdocs) - 1 else None
-    
-    return prev_doc, next_doc
\ No newline at end of file
+    return get_catalog().sibling_navigation(doc_path)
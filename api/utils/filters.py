@@ -8,4 +8,6 @@ def register_filters(app):
         
     @app.template_filter('now')
     def _jinja2_filter_now(format_string="%Y-%m-%d"):
-        return datetime.now().strftime(format_string)
\ No newline at end of file
+        return datetime.now().strftime(format_string)
+
+    app.add_template_global(_jinja2_filter_now, 'now')
\ No newline at end of file
@@ -0,0 +1,190 @@
+import os
+import re
+import shutil
+import time
+import threading
+import subprocess
+import logging
+from datetime import datetime, timezone
+from api.config import GITHUB_REPO, DOCS_DIR, HISTORY_CONFIG
+
+logger = logging.getLogger(__name__)
+
+HISTORY_LIMIT = 20
+GIT_TIMEOUT = 30
+
+COMMIT_HASH_PATTERN = re.compile(r'^[0-9a-fA-F]{4,40}$')
+NOREPLY_EMAIL_PATTERN = re.compile(r'^(?:\d+\+)?([A-Za-z0-9-]+)@users\.noreply\.github\.com$')
+
+_RECORD = '\x1e'
+_FIELD = '\x1f'
+
+# Local commits only carry an email; GitHub's noreply addresses map back to a
+# login without asking GitHub, other addresses go through resolve_username.
+def get_username_from_email(email):
+    match = NOREPLY_EMAIL_PATTERN.match(email or '')
+    return match.group(1) if match else ""
+
+class LocalGitHistory:
+    def __init__(self, repo_dir, docs_dir, repo=GITHUB_REPO, limit=HISTORY_LIMIT, retry_after=300.0):
+        self.repo_dir = repo_dir
+        self.git_dir = os.path.join(repo_dir, '.git')
+        self.prefix = os.path.relpath(docs_dir, repo_dir).replace(os.sep, '/')
+        self.repo = repo
+        self.limit = limit
+        self.retry_after = retry_after
+        # resolve_username(email, sha) maps an address that isn't a noreply
+        # one to a login ("" for none, None when the lookup failed); left
+        # unset, such commits carry no username.
+        self.resolve_username = None
+        self.walks = 0
+        self.failures = 0
+        self._histories = None
+        self._signature = None
+        self._failed_at = None
+        self._unresolved = {}
+        self._resolving = False
+        self._resolve_after = 0.0
+        self._lock = threading.Lock()
+
+    # Shallow clones (what most deploy platforms check out) only hold the tip
+    # commit, so they would report a one-entry history for every document.
+    def is_available(self):
+        return (
+            os.path.isdir(self.git_dir)
+            and not os.path.exists(os.path.join(self.git_dir, 'shallow'))
+            and shutil.which('git') is not None
+        )
+
+    # Same shape as get_github_file_history; None when the repository can't
+    # be read, so callers know to fall back.
+    def file_history(self, file_path):
+        histories = self.histories()
+        if histories is None:
+            return None
+        return list(histories.get(file_path, []))
+
+    def file_at_commit(self, file_path, commit_hash):
+        if not COMMIT_HASH_PATTERN.match(commit_hash):
+            return None
+        try:
+            result = self._git('cat-file', 'blob', f'{commit_hash}:{file_path}')
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning(f"Could not read {file_path} at {commit_hash}: {e}")
+            return None
+        if result.returncode != 0:
+            return None
+        return result.stdout.decode('utf-8', errors='replace')
+
+    # Per-file history for the whole docs tree, built from one log walk and
+    # reused until HEAD moves. A failed walk is not retried for the same HEAD
+    # until retry_after has passed, so callers fall back instead of waiting
+    # on git on every request. Logins are looked up after the lock is
+    # released, and the ones that failed are retried after retry_after.
+    def histories(self):
+        signature = self._head_signature()
+        with self._lock:
+            retry_walk = self._failed_at is None or time.monotonic() - self._failed_at >= self.retry_after
+            if signature != self._signature or (self._histories is None and retry_walk):
+                self._histories, self._unresolved = self._walk()
+                self._signature = signature
+                self._resolve_after = 0.0
+                if self._histories is None:
+                    self.failures += 1
+                    self._failed_at = time.monotonic()
+                else:
+                    self._failed_at = None
+
+            histories = self._histories
+            pending = None
+            if self._unresolved and not self._resolving and time.monotonic() >= self._resolve_after:
+                self._resolving = True
+                pending = {email: commits[0]['hash'] for email, commits in self._unresolved.items()}
+
+        if pending:
+            self._resolve_usernames(pending)
+        return histories
+
+    def _resolve_usernames(self, pending):
+        resolved = {}
+        try:
+            for email, sha in pending.items():
+                username = self.resolve_username(email, sha)
+                if username is not None:
+                    resolved[email] = username
+        finally:
+            with self._lock:
+                self._resolving = False
+                for email, username in resolved.items():
+                    for commit in self._unresolved.pop(email, ()):
+                        commit['author_username'] = username
+                if self._unresolved:
+                    self._resolve_after = time.monotonic() + self.retry_after
+
+    def stats(self):
+        return {
+            'available': self.is_available(),
+            'walks': self.walks,
+            'failures': self.failures,
+            'unresolved_emails': len(self._unresolved),
+            'files': len(self._histories or ())
+        }
+
+    def _head_signature(self):
+        signature = []
+        for name in ('HEAD', os.path.join('logs', 'HEAD')):
+            try:
+                signature.append(os.stat(os.path.join(self.git_dir, name)).st_mtime_ns)
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _git(self, *args):
+        return subprocess.run(
+            ['git', '-C', self.repo_dir, '-c', 'core.quotePath=false', *args],
+            capture_output=True,
+            timeout=GIT_TIMEOUT
+        )
+
+    def _walk(self):
+        try:
+            result = self._git(
+                'log',
+                f'--format={_RECORD}%H{_FIELD}%an{_FIELD}%ae{_FIELD}%at{_FIELD}%s',
+                '--name-only',
+                '--', self.prefix
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning(f"Could not read local git history: {e}")
+            return None, {}
+        if result.returncode != 0:
+            logger.warning(f"Could not read local git history: {result.stderr.decode('utf-8', errors='replace').strip()}")
+            return None, {}
+        self.walks += 1
+
+        # Commits whose email needs resolve_username, by email.
+        histories = {}
+        unresolved = {}
+        for record in result.stdout.decode('utf-8', errors='replace').split(_RECORD)[1:]:
+            header, _, files = record.partition('\n')
+            sha, author, email, timestamp, message = header.split(_FIELD, 4)
+            username = get_username_from_email(email)
+            commit_data = {
+                "hash": sha,
+                "short_hash": sha[:7],
+                "author": author,
+                "author_username": username,
+                "date": datetime.fromtimestamp(int(timestamp), timezone.utc).strftime("%Y-%m-%d %H:%M"),
+                "message": message,
+                "url": f"https://github.com/{self.repo}/commit/{sha}"
+            }
+            if not username and self.resolve_username is not None:
+                unresolved.setdefault(email, []).append(commit_data)
+            for file_path in files.split('\n'):
+                if file_path:
+                    history = histories.setdefault(file_path, [])
+                    if len(history) < self.limit:
+                        history.append(commit_data)
+        return histories, unresolved
+
+local_history = LocalGitHistory(HISTORY_CONFIG['repo_dir'], DOCS_DIR, retry_after=HISTORY_CONFIG['retry_after'])
@@ -0,0 +1,189 @@
+import time
+import threading
+import contextvars
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from api.config import GITHUB_CLIENT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+_deadline = contextvars.ContextVar('github_deadline', default=None)
+
+class GitHubUnavailable(Exception):
+    pass
+
+class GitHubClient:
+    def __init__(self, timeout=10.0, max_concurrency=4, pool_size=8, failure_threshold=3, cooldown=60.0, render_budget=2.0):
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.render_budget = render_budget
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._open_until = 0.0
+        self._tripped = False
+        self._probing = False
+        self.requests = 0
+        self.not_modified = 0
+        self.failures = 0
+        self.circuit_opens = 0
+        self.short_circuits = 0
+        self.probes = 0
+        self.budget_exhausted = 0
+        self.saturated = 0
+        self.rate_limit = None
+        self.rate_limit_remaining = None
+        self.rate_limit_reset = None
+
+    # Caps the time every GitHub call made inside the block may take,
+    # together. Calls past the deadline fail fast, so callers fall back to
+    # whatever they have cached. None uses render_budget; nested budgets keep
+    # the earlier deadline.
+    @contextmanager
+    def budget(self, seconds=None):
+        seconds = self.render_budget if seconds is None else seconds
+        if not seconds or seconds <= 0:
+            yield
+            return
+        deadline = time.monotonic() + seconds
+        current = _deadline.get()
+        token = _deadline.set(deadline if current is None else min(current, deadline))
+        try:
+            yield
+        finally:
+            _deadline.reset(token)
+
+    # Closed, or open past its deadline with no probe in flight: the next
+    # request may go out.
+    def is_available(self):
+        return not self._tripped or (time.monotonic() >= self._open_until and not self._probing)
+
+    # Once the open period ends the circuit is half-open: the first request
+    # goes out as a probe while everything else still short-circuits. The
+    # probe's answer closes the circuit, or its failure opens it again for a
+    # full cooldown.
+    def _admit(self):
+        with self._lock:
+            if not self._tripped:
+                return False
+            if time.monotonic() < self._open_until or self._probing:
+                self.short_circuits += 1
+                raise GitHubUnavailable("GitHub circuit is open")
+            self._probing = True
+            self.probes += 1
+            return True
+
+    def get(self, url, params=None, headers=None):
+        timeout = self.timeout
+        deadline = _deadline.get()
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                self._count('budget_exhausted')
+                raise GitHubUnavailable("GitHub budget for this request is spent")
+
+        probe = self._admit()
+        try:
+            if not self._slots.acquire(timeout=timeout):
+                self._count('saturated')
+                raise GitHubUnavailable("Too many concurrent GitHub requests")
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=timeout)
+            except requests.RequestException:
+                self._record_failure(probe)
+                raise
+            finally:
+                self._slots.release()
+
+            self._record_response(response, probe)
+            return response
+        finally:
+            if probe:
+                with self._lock:
+                    self._probing = False
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _open(self, until):
+        self._tripped = True
+        if until > self._open_until:
+            self._open_until = until
+            self.circuit_opens += 1
+
+    def _record_failure(self, probe=False):
+        with self._lock:
+            self.failures += 1
+            self._failures += 1
+            if probe or self._failures >= self.failure_threshold:
+                if probe:
+                    logger.warning(f"GitHub probe failed, pausing requests for another {self.cooldown:.0f}s")
+                else:
+                    logger.warning(f"GitHub failed {self._failures} times in a row, pausing requests for {self.cooldown:.0f}s")
+                self._open(time.monotonic() + self.cooldown)
+                self._failures = 0
+
+    # The circuit opens until the reset time once the rate limit is spent,
+    # for Retry-After on secondary limits, and for cooldown after
+    # failure_threshold consecutive errors (or one failed probe). Any other
+    # answer to a probe closes it.
+    def _record_response(self, response, probe=False):
+        headers = response.headers
+        with self._lock:
+            self.requests += 1
+            if response.status_code == 304:
+                self.not_modified += 1
+            if 'X-RateLimit-Remaining' in headers:
+                self.rate_limit = int(headers.get('X-RateLimit-Limit', 0)) or self.rate_limit
+                self.rate_limit_remaining = int(headers['X-RateLimit-Remaining'])
+                self.rate_limit_reset = int(headers.get('X-RateLimit-Reset', 0)) or self.rate_limit_reset
+
+            if self.rate_limit_remaining == 0 and self.rate_limit_reset:
+                self._open(time.monotonic() + max(0, self.rate_limit_reset - time.time()) + 1)
+            elif response.status_code in (403, 429) and headers.get('Retry-After', '').isdigit():
+                self._open(time.monotonic() + int(headers['Retry-After']))
+
+        if response.status_code >= 500:
+            self._record_failure(probe)
+            return
+
+        with self._lock:
+            if response.status_code < 400:
+                self._failures = 0
+            if probe and time.monotonic() >= self._open_until:
+                self._tripped = False
+                logger.info("GitHub probe succeeded, resuming requests")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'not_modified': self.not_modified,
+                'failures': self.failures,
+                'circuit_open': not self.is_available(),
+                'circuit_opens': self.circuit_opens,
+                'short_circuits': self.short_circuits,
+                'probes': self.probes,
+                'budget_exhausted': self.budget_exhausted,
+                'saturated': self.saturated,
+                'rate_limit': self.rate_limit,
+                'rate_limit_remaining': self.rate_limit_remaining,
+                'rate_limit_reset': datetime.fromtimestamp(self.rate_limit_reset).isoformat() if self.rate_limit_reset else None
+            }
+
+github_client = GitHubClient(
+    GITHUB_CLIENT_CONFIG['timeout'],
+    GITHUB_CLIENT_CONFIG['max_concurrency'],
+    GITHUB_CLIENT_CONFIG['pool_size'],
+    GITHUB_CLIENT_CONFIG['failure_threshold'],
+    GITHUB_CLIENT_CONFIG['cooldown'],
+    GITHUB_CLIENT_CONFIG['render_budget']
+)
@@ -1,129 +1,309 @@
 import os
-import requests
-from datetime import datetime, timedelta
-import functools
-import json
-from api.config import GITHUB_REPO
-
-CACHE_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'github_cache.json')
-CACHE_DURATION = timedelta(hours=6)
-
-def load_cache():
-    if not os.path.exists(CACHE_FILE):
-        return {}
-    try:
-        with open(CACHE_FILE, 'r') as f:
-            cache = json.load(f)
-            for key in list(cache.keys()):
-                if datetime.fromisoformat(cache[key]['timestamp']) < datetime.now() - CACHE_DURATION:
-                    del cache[key]
-            return cache
-    except:
-        return {}
+import time
+from datetime import datetime
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from api.config import GITHUB_REPO, HISTORY_CONFIG, GITHUB_CACHE_CONFIG
+from api.utils.git_history import local_history
+from api.utils.kv_store import KeyValueStore
+from api.utils.github_client import github_client
 
-def save_cache(cache):
-    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
-    try:
-        with open(CACHE_FILE, 'w') as f:
-            json.dump(cache, f)
-    except:
-        pass
+logger = logging.getLogger(__name__)
 
-def get_github_file_history(file_path, repo=GITHUB_REPO):
-    cache = load_cache()
-    cache_key = f"{repo}:{file_path}"
-    
-    if cache_key in cache:
-        return cache[cache_key]['data']
-    
-    api_url = f"https://api.github.com/repos/{repo}/commits"
-    params = {"path": file_path, "per_page": 50}
-    
-    headers = {}
+DOCS_PATH = "api/templates/docs"
+HISTORY_LIMIT = 20
+COMMITS_PER_PAGE = 100
+
+github_cache = KeyValueStore(
+    GITHUB_CACHE_CONFIG['path'],
+    GITHUB_CACHE_CONFIG['max_bytes'],
+    GITHUB_CACHE_CONFIG['ttl'],
+    GITHUB_CACHE_CONFIG['front_size']
+)
+
+class GitHubMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.fresh_hits = 0
+        self.stale_served = 0
+        self.misses = 0
+        self.background_refreshes = 0
+        self.refresh_failures = 0
+
+    def count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.fresh_hits + self.stale_served + self.misses
+            return {
+                'fresh_hits': self.fresh_hits,
+                'stale_served': self.stale_served,
+                'stale_ratio': round(self.stale_served / lookups, 3) if lookups else 0.0,
+                'misses': self.misses,
+                'background_refreshes': self.background_refreshes,
+                'refresh_failures': self.refresh_failures
+            }
+
+github_metrics = GitHubMetrics()
+
+TEMPLATE_HISTORY_MEMO_SIZE = 1024
+_template_histories = OrderedDict()
+_template_histories_lock = threading.Lock()
+
+refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='github-refresh')
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+def get_github_headers(accept=None):
+    headers = {"Accept": accept} if accept else {}
     github_token = os.environ.get("GITHUB_TOKEN")
     if github_token:
         headers["Authorization"] = f"token {github_token}"
-    
+    return headers
+
+# Conditional requests replay the validators GitHub sent with the cached
+# copy; a 304 answer does not count against the rate limit.
+def fetch_github(url, params=None, accept=None, previous=None):
+    headers = get_github_headers(accept)
+    if previous:
+        if previous.get('etag'):
+            headers["If-None-Match"] = previous['etag']
+        elif previous.get('last_modified'):
+            headers["If-Modified-Since"] = previous['last_modified']
+    return github_client.get(url, params=params, headers=headers)
+
+def make_envelope(data, response=None):
+    return {
+        'data': data,
+        'etag': response.headers.get('ETag') if response is not None else None,
+        'last_modified': response.headers.get('Last-Modified') if response is not None else None
+    }
+
+# Entries are envelopes holding the data and its validators. A fresh entry
+# is returned as is; an expired one is returned straight away while a single
+# background refresh per key revalidates it; only a miss waits on GitHub.
+# load(previous) returns the new envelope, or None to keep what is cached.
+def get_cached_github(cache_key, load):
+    entry = github_cache.get_entry(cache_key)
+    if entry is not None:
+        envelope, fresh = entry
+        if fresh:
+            github_metrics.count('fresh_hits')
+        else:
+            github_metrics.count('stale_served')
+            schedule_refresh(cache_key, load, envelope)
+        return envelope['data']
+
+    github_metrics.count('misses')
+    envelope = load(None)
+    if envelope is None:
+        return None
+    github_cache.set(cache_key, envelope)
+    return envelope['data']
+
+def schedule_refresh(cache_key, load, previous):
+    if not github_client.is_available():
+        return
+    with _refreshing_lock:
+        if cache_key in _refreshing:
+            return
+        _refreshing.add(cache_key)
+    refresh_executor.submit(_refresh_entry, cache_key, load, previous)
+
+def _refresh_entry(cache_key, load, previous):
     try:
-        response = requests.get(api_url, params=params, headers=headers, timeout=10)
-        
+        envelope = load(previous)
+        if envelope is not None:
+            github_cache.set(cache_key, envelope)
+        github_metrics.count('background_refreshes')
+    except Exception as e:
+        logger.warning(f"Background refresh of {cache_key} failed: {e}")
+        github_metrics.count('refresh_failures')
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(cache_key)
+
+def format_commit(commit):
+    return {
+        "hash": commit["sha"],
+        "short_hash": commit["sha"][:7],
+        "author": commit["commit"]["author"]["name"],
+        "author_username": (commit.get("author") or {}).get("login", ""),
+        "date": datetime.strptime(
+            commit["commit"]["author"]["date"], 
+            "%Y-%m-%dT%H:%M:%SZ"
+        ).strftime("%Y-%m-%d %H:%M"),
+        "message": commit["commit"]["message"].split("\n")[0],
+        "url": commit["html_url"]
+    }
+
+def use_local_history(repo=GITHUB_REPO):
+    if HISTORY_CONFIG['provider'] == 'github' or repo != local_history.repo:
+        return False
+    return HISTORY_CONFIG['provider'] == 'git' or local_history.is_available()
+
+# Local history when the deployment has the repository, GitHub otherwise (or
+# when the local walk fails, unless the provider is pinned to 'git').
+def get_file_history(file_path, repo=GITHUB_REPO):
+    if use_local_history(repo):
+        history = local_history.file_history(file_path)
+        if history is not None or HISTORY_CONFIG['provider'] == 'git':
+            return history or []
+    histories = get_cached_github_histories(repo)
+    if histories is not None:
+        return list(histories.get(file_path, []))
+    return get_github_file_history(file_path, repo)
+
+def get_file_at_commit(file_path, commit_hash, repo=GITHUB_REPO):
+    if use_local_history(repo):
+        content = local_history.file_at_commit(file_path, commit_hash)
+        if content is not None or HISTORY_CONFIG['provider'] == 'git':
+            return content
+    return get_github_file_at_commit(file_path, commit_hash, repo)
+
+def get_github_file_history(file_path, repo=GITHUB_REPO):
+    api_url = f"https://api.github.com/repos/{repo}/commits"
+    params = {"path": file_path, "per_page": 50}
+
+    def load(previous):
+        response = fetch_github(api_url, params, previous=previous)
+        if response.status_code == 304:
+            return previous
         if response.status_code == 403:
-            if cache_key in cache:
-                return cache[cache_key]['data']
-            return []
-        
+            return None
         response.raise_for_status()
-        
         commits = response.json()
-        history = []
-        
-        for commit in commits[:20]:
-            commit_data = {
-                "hash": commit["sha"],
-                "short_hash": commit["sha"][:7],
-                "author": commit["commit"]["author"]["name"],
-                "author_username": commit.get("author", {}).get("login", ""),
-                "date": datetime.strptime(
-                    commit["commit"]["author"]["date"], 
-                    "%Y-%m-%dT%H:%M:%SZ"
-                ).strftime("%Y-%m-%d %H:%M"),
-                "message": commit["commit"]["message"].split("\n")[0],
-                "url": commit["html_url"]
-            }
-            history.append(commit_data)
-        
-        cache[cache_key] = {
-            'data': history,
-            'timestamp': datetime.now().isoformat()
-        }
-        save_cache(cache)
-        return history
-        
+        return make_envelope([format_commit(commit) for commit in commits[:HISTORY_LIMIT]], response)
+
+    try:
+        return get_cached_github(f"{repo}:{file_path}", load) or []
     except Exception as e:
-        if cache_key in cache:
-            return cache[cache_key]['data']
         return []
 
-def get_file_at_commit(file_path, commit_hash, repo=GITHUB_REPO):
-    cache = load_cache()
+def get_github_file_at_commit(file_path, commit_hash, repo=GITHUB_REPO):
     cache_key = f"{repo}:{file_path}:{commit_hash}"
-    
-    if cache_key in cache:
-        return cache[cache_key]['data']
+    cached = github_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
     api_url = f"https://api.github.com/repos/{repo}/contents/{file_path}"
     params = {"ref": commit_hash}
     
-    headers = {"Accept": "application/vnd.github.v3.raw"}
-    github_token = os.environ.get("GITHUB_TOKEN")
-    if github_token:
-        headers["Authorization"] = f"token {github_token}"
-    
     try:
-        response = requests.get(api_url, params=params, headers=headers, timeout=10)
+        response = fetch_github(api_url, params, accept="application/vnd.github.v3.raw")
         if response.status_code == 403:
             return None
         response.raise_for_status()
         
+        # A file at a given commit never changes, so it is kept until evicted.
         content = response.text
-        cache[cache_key] = {
-            'data': content,
-            'timestamp': datetime.now().isoformat()
-        }
-        save_cache(cache)
+        github_cache.set(cache_key, content, ttl=0)
         return content
     except:
         return None
 
-@functools.lru_cache(maxsize=32)
-def get_template_history(template_name):
-    # Handle nested paths
-    md_path = f"api/templates/docs/{template_name}.md"
-    html_path = f"api/templates/docs/{template_name}.html"
-    
-    md_history = get_github_file_history(md_path)
-    html_history = get_github_file_history(html_path)
-    
+# Logins for commit emails the local walk can't map itself, one lookup per
+# address. A commit GitHub doesn't know (not pushed yet) caches an empty login
+# like an author without an account; other failures return None so the walk
+# retries them later. HISTORY_PROVIDER=git never asks GitHub.
+def get_github_username(email, sha, repo=GITHUB_REPO):
+    cache_key = f"{repo}:login:{email}"
+    cached = github_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        response = fetch_github(f"https://api.github.com/repos/{repo}/commits/{sha}")
+        if response.status_code in (404, 422):
+            login = ""
+        else:
+            response.raise_for_status()
+            login = (response.json().get("author") or {}).get("login", "")
+    except Exception as e:
+        logger.warning(f"Could not look up the GitHub login for {sha}: {e}")
+        return None
+    github_cache.set(cache_key, login)
+    return login
+
+if HISTORY_CONFIG['provider'] != 'git':
+    local_history.resolve_username = get_github_username
+
+# Page views take the map whether or not it has expired; refreshing it is
+# left to the background history batch.
+def get_cached_github_histories(repo=GITHUB_REPO, path=DOCS_PATH):
+    entry = github_cache.get_entry(f"{repo}:tree:{path}")
+    return entry[0]['data'] if entry else None
+
+# Commit file lists never change, so they are cached without expiry and a
+# reload only fetches details for commits it hasn't seen.
+def get_commit_files(sha, repo=GITHUB_REPO):
+    cache_key = f"{repo}:commit:{sha}"
+    cached = github_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    response = fetch_github(f"https://api.github.com/repos/{repo}/commits/{sha}")
+    response.raise_for_status()
+    files = [file["filename"] for file in response.json().get("files", [])]
+    github_cache.set(cache_key, files, ttl=0)
+    return files
+
+# Walks every commit touching the docs tree once, newest first, and builds
+# the per-file histories get_github_file_history would return for each path,
+# so the request count follows the number of commits instead of documents.
+# An expired map is revalidated with the first listing page's ETag, and a
+# 304 keeps it without walking. The map and each file's entry land in the
+# cache; on failure the previous map (or None) is returned.
+def load_github_histories(repo=GITHUB_REPO, path=DOCS_PATH, limit=HISTORY_LIMIT):
+    tree_key = f"{repo}:tree:{path}"
+    entry = github_cache.get_entry(tree_key)
+    if entry is not None and entry[1]:
+        return entry[0]['data']
+    previous = entry[0] if entry is not None else None
+
+    api_url = f"https://api.github.com/repos/{repo}/commits"
+    histories = {}
+    page = 1
+    try:
+        response = fetch_github(api_url, {"path": path, "per_page": COMMITS_PER_PAGE, "page": page}, previous=previous)
+        if response.status_code == 304:
+            github_cache.set(tree_key, previous)
+            return previous['data']
+        first_page = response
+
+        while True:
+            response.raise_for_status()
+            commits = response.json()
+
+            for commit in commits:
+                commit_data = format_commit(commit)
+                for file_path in get_commit_files(commit["sha"], repo):
+                    if file_path.startswith(f"{path}/"):
+                        history = histories.setdefault(file_path, [])
+                        if len(history) < limit:
+                            history.append(commit_data)
+
+            if len(commits) < COMMITS_PER_PAGE or "next" not in response.links:
+                break
+            page += 1
+            response = fetch_github(api_url, {"path": path, "per_page": COMMITS_PER_PAGE, "page": page})
+    except Exception as e:
+        logger.warning(f"Failed to load GitHub history for {path}: {e}")
+        return previous['data'] if previous else None
+
+    entries = {f"{repo}:{file_path}": make_envelope(history) for file_path, history in histories.items()}
+    entries[tree_key] = make_envelope(histories, first_page)
+    github_cache.set_many(entries)
+    return histories
+
+def get_template_paths(template_name):
+    return f"{DOCS_PATH}/{template_name}.md", f"{DOCS_PATH}/{template_name}.html"
+
+def combine_histories(md_history, html_history):
     combined_history = md_history + html_history
     return sorted(
         combined_history, 
@@ -131,6 +311,31 @@ def get_template_history(template_name):
         reverse=True
     )
 
+# GitHub histories are memoized per process for the cache TTL, as the
+# lru_cache used to, so a page's four lookups and every page after it skip
+# the store. Empty results are left out: under a spent budget or an open
+# circuit they only mean the lookup didn't happen. Local history is already
+# an in-memory map that follows HEAD.
+def get_template_history(template_name):
+    local = use_local_history()
+    if not local:
+        with _template_histories_lock:
+            memo = _template_histories.get(template_name)
+            if memo is not None and memo[1] > time.monotonic():
+                _template_histories.move_to_end(template_name)
+                return memo[0]
+
+    md_path, html_path = get_template_paths(template_name)
+    history = combine_histories(get_file_history(md_path), get_file_history(html_path))
+
+    if not local and history:
+        with _template_histories_lock:
+            _template_histories[template_name] = (history, time.monotonic() + GITHUB_CACHE_CONFIG['ttl'])
+            _template_histories.move_to_end(template_name)
+            while len(_template_histories) > TEMPLATE_HISTORY_MEMO_SIZE:
+                _template_histories.popitem(last=False)
+    return history
+
 def get_document_contributors(template_name):
     history = get_template_history(template_name)
     contributors = {}
@@ -152,10 +357,27 @@ def get_document_author(template_name):
         return history[-1].get("author_username", "")
     return ""
 
-def get_last_updated(template_name):
-    history = get_template_history(template_name)
+# One call for the whole catalog, so callers that need every document's
+# history (the recently-updated flags, the sitemap) have a single batch to run
+# in the background.
+def get_template_histories(template_names):
+    if not use_local_history() or (local_history.histories() is None and HISTORY_CONFIG['provider'] != 'git'):
+        histories = load_github_histories()
+        if histories is not None:
+            return {
+                template_name: combine_histories(*(histories.get(path, []) for path in get_template_paths(template_name)))
+                for template_name in template_names
+            }
+    return {template_name: get_template_history(template_name) for template_name in template_names}
+
+def get_last_modified(history):
     if history:
-        last_update = datetime.strptime(history[0]["date"], "%Y-%m-%d %H:%M")
+        return datetime.strptime(history[0]["date"], "%Y-%m-%d %H:%M")
+    return None
+
+def describe_last_updated(history):
+    last_update = get_last_modified(history)
+    if last_update:
         now = datetime.now()
         diff = now - last_update
         
@@ -171,6 +393,9 @@ def get_last_updated(template_name):
             return None
     return None
 
+def get_last_updated(template_name):
+    return describe_last_updated(get_template_history(template_name))
+
 def is_recently_updated(template_name):
     last_updated = get_last_updated(template_name)
     return last_updated is not None
\ No newline at end of file
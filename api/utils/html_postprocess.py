@@ -0,0 +1,218 @@
+import re
+from html import unescape
+from html.entities import html5 as HTML5_ENTITIES
+
+_TOKEN_RE = re.compile(r'''
+    <!--(?:>|->|(?P<comment>.*?)--!?>)
+  | <(?P<end>/)?(?P<tag>[a-zA-Z][a-zA-Z0-9:-]*)
+     (?P<attrs>(?:\s+[^\s"'>/=]+(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s>]+))?)*)
+     \s*(?P<selfclose>/)?>
+''', re.DOTALL | re.VERBOSE)
+
+_ATTR_RE = re.compile(r'''([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?''')
+
+_TEXT_ESCAPE_RE = re.compile(r'&(#[0-9]+;|#[xX][0-9a-fA-F]+;|[a-zA-Z][a-zA-Z0-9]*;)?|[<>]')
+
+_URL_SCHEME_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9+.-]*):')
+
+_URL_JUNK_RE = re.compile(r'[\x00-\x20\x7f]+')
+
+_TAG_STRIP_RE = re.compile(r'<[^>]+>')
+
+VOID_ELEMENTS = frozenset(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'])
+
+URL_ATTRIBUTES = frozenset(['href', 'src', 'poster', 'action', 'formaction', 'background', 'cite', 'longdesc'])
+
+HEADING_TAGS = frozenset(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+
+def slugify_heading(text):
+    heading_id = re.sub(r'[^\w\s-]', '', text.lower())
+    return re.sub(r'[-\s]+', '-', heading_id).strip('-')
+
+def _escape_text_match(match):
+    token = match.group(0)
+    if token == '<':
+        return '&lt;'
+    if token == '>':
+        return '&gt;'
+    entity = match.group(1)
+    if entity and (entity[0] == '#' or entity in HTML5_ENTITIES):
+        return token
+    return '&amp;' + (entity or '')
+
+def escape_text(text):
+    if '&' in text or '<' in text or '>' in text:
+        return _TEXT_ESCAPE_RE.sub(_escape_text_match, text)
+    return text
+
+def serialize_attribute(name, value):
+    value = value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    if '"' in value:
+        if "'" not in value:
+            return f" {name}='{value}'"
+        value = value.replace('"', '&quot;')
+    return f' {name}="{value}"'
+
+def parse_attributes(attrs_text):
+    attributes = []
+    seen = set()
+    for match in _ATTR_RE.finditer(attrs_text):
+        name = match.group(1).lower()
+        if name in seen:
+            continue
+        seen.add(name)
+        value = match.group(2)
+        if value is None:
+            value = match.group(3)
+        if value is None:
+            value = match.group(4)
+        attributes.append((name, unescape(value) if value else ''))
+    return attributes
+
+def serialize_tag(tag, attributes):
+    return '<' + tag + ''.join(serialize_attribute(name, value) for name, value in attributes) + '>'
+
+def iter_tokens(html_content):
+    position = 0
+    for match in _TOKEN_RE.finditer(html_content):
+        if match.start() > position:
+            yield 'text', html_content[position:match.start()], None
+        position = match.end()
+
+        tag = match.group('tag')
+        if tag is None:
+            yield 'comment', match.group('comment') or '', None
+        elif match.group('end'):
+            yield 'end', tag.lower(), match
+        else:
+            yield 'start', tag.lower(), match
+
+    if position < len(html_content):
+        yield 'text', html_content[position:], None
+
+class HtmlPostProcessor:
+    def __init__(self, tags, attributes, protocols):
+        self.tags = frozenset(tags)
+        self.attributes = {
+            tag: {name.lower(): name for name in names}
+            for tag, names in attributes.items()
+        }
+        self.protocols = frozenset(protocol.lower() for protocol in protocols)
+
+    def _is_allowed_url(self, value):
+        url = _URL_JUNK_RE.sub('', unescape(value))
+        if not url or url.startswith('#'):
+            return True
+        scheme = _URL_SCHEME_RE.match(url)
+        return scheme is None or scheme.group(1).lower() in self.protocols
+
+    def _clean_attributes(self, tag, attributes):
+        allowed = self.attributes.get(tag, {})
+        cleaned = []
+        for name, value in attributes:
+            canonical = allowed.get(name)
+            if canonical is None:
+                continue
+            if name in URL_ATTRIBUTES and not self._is_allowed_url(value):
+                continue
+            cleaned.append((canonical, value))
+        return cleaned
+
+    def _decorate_link(self, attributes):
+        names = {name for name, _ in attributes}
+        href = next((value for name, value in attributes if name == 'href'), '')
+        if href.startswith(('http://', 'https://')):
+            if 'target' not in names:
+                attributes.append(('target', '_blank'))
+            if 'rel' not in names:
+                attributes.append(('rel', 'noopener noreferrer'))
+            if 'class' not in names:
+                attributes.append(('class', 'external-link-button'))
+        return attributes
+
+    def process(self, html_content, drop_first_h1=False):
+        output = []
+        open_elements = []
+        heading = None
+        dropping = False
+
+        for kind, value, match in iter_tokens(html_content):
+            if dropping:
+                if kind == 'end' and value == 'h1':
+                    dropping = False
+                continue
+
+            if kind == 'text':
+                output.append(escape_text(value))
+                if heading is not None:
+                    heading['text'].append(value)
+                continue
+
+            if kind == 'comment':
+                output.append(f'<!--{value}-->')
+                continue
+
+            source = match.group(0)
+            if value not in self.tags:
+                output.append(escape_text(source))
+                if heading is not None:
+                    heading['text'].append(source)
+                continue
+
+            if kind == 'end':
+                if value not in open_elements:
+                    continue
+                while open_elements.pop() != value:
+                    pass
+                if heading is not None and value in HEADING_TAGS:
+                    self._close_heading(heading, output)
+                    heading = None
+                output.append(f'</{value}>')
+                continue
+
+            attributes = parse_attributes(match.group('attrs'))
+
+            if value in HEADING_TAGS:
+                if drop_first_h1 and value == 'h1':
+                    drop_first_h1 = False
+                    dropping = True
+                    continue
+                if heading is not None:
+                    self._close_heading(heading, output)
+                heading = {
+                    'level': int(value[1]),
+                    'attributes': attributes,
+                    'index': len(output),
+                    'text': []
+                }
+                output.append(None)
+                open_elements.append(value)
+                continue
+
+            if value == 'a':
+                attributes = self._decorate_link(attributes)
+
+            output.append(serialize_tag(value, self._clean_attributes(value, attributes)))
+            if value in VOID_ELEMENTS:
+                continue
+            if match.group('selfclose'):
+                output.append(f'</{value}>')
+            else:
+                open_elements.append(value)
+
+        if heading is not None:
+            self._close_heading(heading, output)
+
+        for tag in reversed(open_elements):
+            output.append(f'</{tag}>')
+
+        return ''.join(output)
+
+    def _close_heading(self, heading, output):
+        tag = f"h{heading['level']}"
+        attributes = heading['attributes']
+        if not any(name == 'id' for name, _ in attributes):
+            text = _TAG_STRIP_RE.sub('', ''.join(heading['text'])).strip()
+            attributes.append(('id', slugify_heading(text)))
+
+        output[heading['index']] = serialize_tag(tag, self._clean_attributes(tag, attributes))
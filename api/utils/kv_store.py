@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+FRONT_TTL = 30
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        expires_at REAL,
+        updated_at REAL NOT NULL
+    )
+'''
+
+class KeyValueStore:
+    def __init__(self, path, max_bytes, default_ttl, front_size=256, busy_timeout=5.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.front_size = front_size
+        self.busy_timeout = busy_timeout
+        self._front = OrderedDict()
+        self._front_bytes = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._disabled = not path
+        self._unchecked_bytes = max_bytes
+        self.hits = 0
+        self.front_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    # One connection per thread and process. WAL lets readers in other
+    # workers proceed during a write, and the busy timeout makes competing
+    # writers queue up instead of failing.
+    def _connection(self):
+        if self._disabled:
+            return None
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Key-value store at {self.path} unavailable, keeping entries in memory only: {e}")
+            self._disabled = True
+            return None
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _expires_at(self, ttl, now):
+        ttl = self.default_ttl if ttl is None else ttl
+        return now + ttl if ttl > 0 else None
+
+    # With SQLite behind it the front cache only saves a query, so entries
+    # stay at most FRONT_TTL and front_size bounds it. Without SQLite the
+    # front cache is the store: entries keep their real expiry, expired ones
+    # stay to be served stale until evicted, and max_bytes bounds it.
+    def _remember(self, key, value, expires_at, now, size):
+        if self._disabled:
+            front_expires_at = float('inf') if expires_at is None else expires_at
+        else:
+            front_expires_at = now + FRONT_TTL if expires_at is None else min(expires_at, now + FRONT_TTL)
+        with self._lock:
+            self._forget(key)
+            self._front[key] = (value, front_expires_at, size)
+            self._front_bytes += size
+            if self._disabled:
+                while self._front_bytes > self.max_bytes and len(self._front) > 1:
+                    self._forget(next(iter(self._front)))
+                    self.evictions += 1
+            else:
+                while len(self._front) > self.front_size:
+                    self._forget(next(iter(self._front)))
+
+    # Callers hold self._lock.
+    def _forget(self, key):
+        entry = self._front.pop(key, None)
+        if entry is not None:
+            self._front_bytes -= entry[2]
+
+    def get(self, key, default=None):
+        entry = self.get_entry(key)
+        if entry is None or not entry[1]:
+            return default
+        return entry[0]
+
+    # Returns (value, fresh), including entries past their expiry that have
+    # not been evicted yet, so callers can serve them while revalidating.
+    def get_entry(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._front.get(key)
+            if entry is not None and entry[1] > now:
+                self._front.move_to_end(key)
+                self.hits += 1
+                self.front_hits += 1
+                return entry[0], True
+            if entry is not None and self._disabled:
+                self._front.move_to_end(key)
+                self.stale_hits += 1
+                return entry[0], False
+
+        conn = self._connection()
+        row = None
+        if conn is not None:
+            try:
+                row = conn.execute('SELECT value, expires_at FROM entries WHERE key = ?', (key,)).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to read key-value entry {key}: {e}")
+
+        if row is None:
+            with self._lock:
+                self._forget(key)
+                self.misses += 1
+            return None
+
+        value = json.loads(row[0])
+        fresh = row[1] is None or row[1] > now
+        with self._lock:
+            if fresh:
+                self.hits += 1
+            else:
+                self._forget(key)
+                self.stale_hits += 1
+        if fresh:
+            self._remember(key, value, row[1], now, len(row[0].encode('utf-8')))
+        return value, fresh
+
+    # ttl is in seconds; None uses the store's default and 0 never expires.
+    def set(self, key, value, ttl=None):
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items, ttl=None):
+        now = time.time()
+        expires_at = self._expires_at(ttl, now)
+        # Connecting first settles whether the front cache is the only copy.
+        conn = self._connection()
+        rows = []
+        for key, value in items.items():
+            data = json.dumps(value, separators=(',', ':'))
+            rows.append((key, data, len(data.encode('utf-8')), expires_at, now))
+            self._remember(key, value, expires_at, now, rows[-1][2])
+
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.executemany('INSERT OR REPLACE INTO entries (key, value, size, expires_at, updated_at) VALUES (?, ?, ?, ?, ?)', rows)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to write {len(rows)} key-value entries: {e}")
+            return
+
+        with self._lock:
+            self.writes += len(rows)
+            self._unchecked_bytes += sum(row[2] for row in rows)
+            check = self._unchecked_bytes >= self.max_bytes // 16
+            if check:
+                self._unchecked_bytes = 0
+        if check:
+            self._evict(conn, now)
+
+    # Summing sizes costs a table scan, so it only runs once writes since the
+    # last check add up to a sixteenth of the budget. Expired entries go
+    # first, then the least recently written, down to 90% of max_bytes.
+    def _evict(self, conn, now):
+        try:
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            target = total - self.max_bytes * 0.9
+            victims = []
+            for key, size in conn.execute(
+                'SELECT key, size FROM entries ORDER BY (expires_at IS NOT NULL AND expires_at <= ?) DESC, updated_at ASC',
+                (now,)
+            ):
+                victims.append((key,))
+                target -= size
+                if target <= 0:
+                    break
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.executemany('DELETE FROM entries WHERE key = ?', victims)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to evict key-value entries: {e}")
+            return
+
+        with self._lock:
+            for (key,) in victims:
+                self._forget(key)
+            self.evictions += len(victims)
+
+    def delete(self, key):
+        with self._lock:
+            self._forget(key)
+        conn = self._connection()
+        if conn is not None:
+            try:
+                conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to delete key-value entry {key}: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._front.clear()
+            self._front_bytes = 0
+        conn = self._connection()
+        if conn is not None:
+            try:
+                conn.execute('DELETE FROM entries')
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to clear key-value store: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'front_entries': len(self._front),
+                'front_bytes': self._front_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'front_hits': self.front_hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'evictions': self.evictions,
+                'persistent': not self._disabled
+            }
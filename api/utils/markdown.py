@@ -1,6 +1,6 @@
 import markdown
-import re
-import bleach
+import sys
+import hashlib
 from api.extensions.glsl import GlslExtension
 from api.extensions.desmos import DesmosExtension
 from api.extensions.mermaid import MermaidExtension
@@ -9,8 +9,10 @@ from api.extensions.p5js import P5jsExtension
 from api.extensions.video import VideoExtension
 from api.extensions.iframe import IframeExtension
 from api.extensions.hint import HintExtension
-from api.utils.cross_reference import process_cross_references
-from api.utils.table_of_contents import generate_table_of_contents, add_ids_to_headings
+from api.extensions.highlight_cache import HighlightCacheExtension
+from api.utils.cross_reference import process_cross_references, get_reference_signature
+from api.utils.html_postprocess import HtmlPostProcessor
+from api.utils.render_cache import render_cache, highlight_cache
 from markdown.extensions.codehilite import CodeHiliteExtension
 from markdown.extensions.fenced_code import FencedCodeExtension
 from markdown.extensions.tables import TableExtension
@@ -44,6 +46,7 @@ MARKDOWN_EXTENSIONS = [
     TableExtension(),
     FencedCodeExtension(),
     CodeHiliteExtension(linenums=False, css_class="codehilite", guess_lang=False),
+    HighlightCacheExtension(highlight_cache),
     GlslExtension(),
     DesmosExtension(),
     MermaidExtension(),
@@ -56,6 +59,35 @@ MARKDOWN_EXTENSIONS = [
     'md_in_html'
 ]
 
+html_postprocessor = HtmlPostProcessor(ALLOWED_TAGS, ALLOWED_ATTRIBUTES, ALLOWED_PROTOCOLS)
+
+def create_markdown_parser():
+    return markdown.Markdown(extensions=MARKDOWN_EXTENSIONS, output_format='html5')
+
+def _get_render_fingerprint():
+    digest = hashlib.sha256()
+    digest.update(f"markdown={markdown.__version__}\n".encode('utf-8'))
+
+    modules = {__name__, process_cross_references.__module__, HtmlPostProcessor.__module__}
+    for extension in MARKDOWN_EXTENSIONS:
+        if isinstance(extension, str):
+            digest.update(f"{extension}\n".encode('utf-8'))
+        else:
+            configs = sorted((key, repr(value)) for key, value in extension.getConfigs().items())
+            digest.update(f"{type(extension).__module__}.{type(extension).__name__}:{configs}\n".encode('utf-8'))
+            modules.add(type(extension).__module__)
+
+    for module_name in sorted(modules):
+        module_file = getattr(sys.modules.get(module_name), '__file__', None)
+        if module_name.startswith('api.') and module_file:
+            with open(module_file, 'rb') as f:
+                digest.update(f.read())
+
+    digest.update(repr((ALLOWED_TAGS, sorted(ALLOWED_ATTRIBUTES.items()), ALLOWED_PROTOCOLS)).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+RENDER_FINGERPRINT = _get_render_fingerprint()
+
 def extract_title_from_markdown(md_content):
     if not md_content:
         return None
@@ -80,54 +112,27 @@ def extract_description_from_markdown(md_content):
 
     return description
 
-def convert_markdown_to_html(md_content):
+# Only the resolution of the references a document actually makes goes into the
+# key, so retitling one document invalidates just the documents linking to it.
+def get_render_cache_key(md_content, drop_first_h1=False):
+    return render_cache.make_key(md_content, RENDER_FINGERPRINT, get_reference_signature(md_content), drop_first_h1)
+
+def convert_markdown_to_html(md_content, drop_first_h1=False):
+    cache_key = get_render_cache_key(md_content, drop_first_h1)
+    cached_html = render_cache.get(cache_key)
+    if cached_html is not None:
+        return cached_html
+
     try:
         md_content = process_cross_references(md_content)
 
-        html_content = markdown.markdown(
-            md_content,
-            extensions=MARKDOWN_EXTENSIONS,
-            output_format='html5'
-        )
-
-        html_content = add_ids_to_headings(html_content)
-
-        def enhance_external_link(match):
-            href = match.group(1)
-            rest_of_tag = match.group(2)
-            content = match.group(3)
-
-            if href.startswith(('http://', 'https://')):
-                if 'target=' not in rest_of_tag:
-                    rest_of_tag += ' target="_blank"'
-                if 'rel=' not in rest_of_tag:
-                    rest_of_tag += ' rel="noopener noreferrer"'
-                if 'class=' not in rest_of_tag:
-                    rest_of_tag += ' class="external-link-button"'
-
-            return f'<a href="{href}"{rest_of_tag}>{content}</a>'
-
-        link_pattern = r'<a href="([^"]*)"([^>]*)>(.*?)</a>'
-        html_content = re.sub(link_pattern, enhance_external_link, html_content, flags=re.DOTALL)
-
-        safe_html = bleach.clean(
-            html_content,
-            tags=ALLOWED_TAGS,
-            attributes=ALLOWED_ATTRIBUTES,
-            protocols=ALLOWED_PROTOCOLS,
-            strip=False,
-            strip_comments=False
-        )
+        html_content = create_markdown_parser().convert(md_content)
 
+        safe_html = html_postprocessor.process(html_content, drop_first_h1=drop_first_h1)
+
+        render_cache.put(cache_key, safe_html)
         return safe_html
 
     except Exception as e:
         print(f"Error converting Markdown to HTML: {str(e)}")
         return f"<p>Error processing content: {str(e)}</p>"
-
-def remove_first_h1(html_content):
-    h1_pattern = re.compile(r'<h1[^>]*>.*?</h1>', re.DOTALL)
-    match = h1_pattern.search(html_content)
-    if match:
-        return html_content.replace(match.group(0), '', 1)
-    return html_content
\ No newline at end of file
@@ -0,0 +1,144 @@
+import os
+import json
+import hashlib
+import threading
+import logging
+from api.config import BUILD_DIR
+from api.utils.documents import get_catalog_version, get_catalog_titles, get_subdocuments
+from api.utils.recent_updates import recent_updates
+from api.utils.dependency_graph import DependencyGraph, diff_catalogs
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+PRERENDERED_VARIANTS = {'page': '.html', 'print': '.print.html'}
+PRERENDERED_ENCODINGS = ['br', 'gzip']
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+# The history a page shows besides its source: its own versions, contributors
+# and badge, and the badges of its subdocuments. Pages record these at build
+# time and are rendered live once any of them changes.
+def get_history_inputs(template_name):
+    inputs = {}
+    for name in [template_name] + [doc['filename'] for doc in get_subdocuments(template_name)]:
+        last_modified = recent_updates.last_modified(name)
+        inputs[name] = {
+            'last_modified': last_modified.isoformat() if last_modified else None,
+            'recent': recent_updates.is_recent(name)
+        }
+    return inputs
+
+class PrerenderedSite:
+    def __init__(self, build_dir):
+        self.build_dir = build_dir
+        self._manifest = None
+        self._manifest_mtime = None
+        self._stale = (None, None, frozenset())
+        self._source_hashes = {}
+        self._lock = threading.Lock()
+
+    def manifest(self):
+        manifest_path = os.path.join(self.build_dir, MANIFEST_NAME)
+        try:
+            mtime = os.stat(manifest_path).st_mtime_ns
+        except OSError:
+            return None
+
+        with self._lock:
+            if mtime != self._manifest_mtime:
+                try:
+                    with open(manifest_path, 'r', encoding='utf-8') as f:
+                        self._manifest = json.load(f)
+                    logger.info(f"Loaded prerendered manifest with {len(self._manifest.get('documents', {}))} documents")
+                except Exception as e:
+                    logger.warning(f"Failed to load prerendered manifest: {e}")
+                    self._manifest = None
+                self._manifest_mtime = mtime
+            return self._manifest
+
+    # Pages affected by catalog changes since the build, found through the
+    # dependency graph recorded in the manifest.
+    def stale_documents(self):
+        manifest = self.manifest()
+        if not manifest:
+            return frozenset()
+
+        catalog_version = get_catalog_version()
+        with self._lock:
+            if self._stale[0] is manifest and self._stale[1] == catalog_version:
+                return self._stale[2]
+
+        if manifest.get('catalog_version') == catalog_version:
+            stale = frozenset()
+        else:
+            changes = diff_catalogs(manifest.get('catalog', {}), get_catalog_titles())
+            stale = frozenset(DependencyGraph.from_manifest(manifest).affected_by(changes))
+            logger.info(f"{len(stale)} prerendered documents are stale after {len(changes)} catalog changes")
+
+        with self._lock:
+            self._stale = (manifest, catalog_version, stale)
+        return stale
+
+    # Only what the last lookups found: reporting never loads the manifest
+    # or recomputes the stale set.
+    def stats(self):
+        with self._lock:
+            manifest = self._manifest
+            stale = self._stale[2]
+        return {
+            'documents': len(manifest.get('documents', {})) if manifest else 0,
+            'stale': sorted(stale)
+        }
+
+    # A checkout, copy or touch changes the mtime without changing the
+    # content, so an mtime mismatch is settled by the hash stored at build
+    # time. The hash is kept per (mtime, size) so it is computed once.
+    def source_matches(self, entry, source_path, stat):
+        if stat.st_size != entry['size']:
+            return False
+        if stat.st_mtime_ns == entry['mtime_ns']:
+            return True
+
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._source_hashes.get(source_path)
+        if cached is None or cached[0] != key:
+            try:
+                with open(source_path, 'rb') as f:
+                    cached = (key, hashlib.sha256(f.read()).hexdigest())
+            except OSError:
+                return False
+            with self._lock:
+                self._source_hashes[source_path] = cached
+        return cached[1] == entry['sha256']
+
+    def find(self, template_name, variant, source_path, encodings=()):
+        manifest = self.manifest()
+        if not manifest or template_name in self.stale_documents():
+            return None
+
+        entry = manifest.get('documents', {}).get(template_name)
+        if not entry or variant not in entry.get('files', {}):
+            return None
+
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return None
+        if not self.source_matches(entry, source_path, stat):
+            return None
+        # Until the first history batch lands there is nothing newer to compare with.
+        if recent_updates.loaded and entry.get('history') != get_history_inputs(template_name):
+            return None
+
+        file_path = os.path.join(self.build_dir, entry['files'][variant])
+        for encoding in encodings:
+            encoded_path = f"{file_path}{ENCODING_SUFFIXES[encoding]}"
+            if encoding in entry.get('encodings', []) and os.path.exists(encoded_path):
+                return encoded_path, encoding
+
+        if os.path.exists(file_path):
+            return file_path, None
+        return None
+
+prerendered_site = PrerenderedSite(BUILD_DIR)
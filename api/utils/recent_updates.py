@@ -0,0 +1,105 @@
+import time
+import threading
+import logging
+from api.config import CATALOG_CONFIG
+from api.utils.github_utils import get_template_histories, get_last_modified, describe_last_updated
+
+logger = logging.getLogger(__name__)
+
+class RecentUpdates:
+    def __init__(self, source, interval=3600.0, background=True):
+        self.source = source
+        self.interval = interval
+        self.background = background
+        self.refreshes = 0
+        self._recent = None
+        self._last_modified = {}
+        self._known = frozenset()
+        self._documents = None
+        self._refreshed_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # Never waits on history: flags from the last batch are copied onto each
+    # newly published document list, and a refresh is started in the
+    # background when the batch is older than interval or misses documents.
+    def apply(self, documents):
+        with self._lock:
+            if documents is not self._documents:
+                self._documents = documents
+                self._set_flags(documents)
+            if self._needs_refresh(documents):
+                names = [doc['filename'] for doc in documents if not doc.get('is_virtual')]
+                self._thread = threading.Thread(target=self._refresh, args=(names,), name='recent-updates', daemon=True)
+                self._thread.start()
+        return documents
+
+    # Runs the batch in the calling thread, for callers that can afford to wait
+    # and need current flags, like the static build.
+    def refresh(self, documents):
+        with self._lock:
+            self._documents = documents
+        self._refresh([doc['filename'] for doc in documents if not doc.get('is_virtual')])
+        return documents
+
+    def last_modified(self, template_name):
+        return self._last_modified.get(template_name)
+
+    def is_recent(self, template_name):
+        return template_name in (self._recent or ())
+
+    @property
+    def loaded(self):
+        return self._recent is not None
+
+    def wait(self, timeout=None):
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self):
+        return {
+            'refreshes': self.refreshes,
+            'documents': len(self._known),
+            'recently_updated': len(self._recent or ()),
+            'refreshing': self._thread is not None,
+            'age': None if self._refreshed_at is None else round(time.monotonic() - self._refreshed_at, 1)
+        }
+
+    def _needs_refresh(self, documents):
+        if not self.background or self._thread is not None:
+            return False
+        if self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.interval:
+            return True
+        return any(doc['filename'] not in self._known for doc in documents if not doc.get('is_virtual'))
+
+    def _set_flags(self, documents):
+        if self._recent is None:
+            return
+        for doc in documents:
+            if not doc.get('is_virtual'):
+                doc['recently_updated'] = doc['filename'] in self._recent
+
+    def _refresh(self, names):
+        try:
+            histories = self.source(names)
+            recent = {name for name, history in histories.items() if describe_last_updated(history)}
+            last_modified = {name: get_last_modified(history) for name, history in histories.items() if history}
+        except Exception as e:
+            logger.warning(f"Failed to refresh document history: {e}")
+            recent = None
+
+        with self._lock:
+            # A failed batch still counts as a refresh, so an unreachable
+            # history source is retried once per interval rather than per request.
+            self._known = frozenset(names)
+            self._refreshed_at = time.monotonic()
+            self._thread = None
+            if recent is not None:
+                self._recent = recent
+                self._last_modified = last_modified
+                self.refreshes += 1
+                if self._documents is not None:
+                    self._set_flags(self._documents)
+
+recent_updates = RecentUpdates(get_template_histories, CATALOG_CONFIG['history_interval'])
@@ -0,0 +1,171 @@
+import os
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from api.config import RENDER_CACHE_CONFIG, HIGHLIGHT_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+class RenderCache:
+    def __init__(self, max_bytes, disk_path=None, disk_max_bytes=0):
+        self.max_bytes = max_bytes
+        self.disk_path = disk_path
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._disk_size = None
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    @staticmethod
+    def make_key(*parts):
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _disk_file(self, key):
+        return os.path.join(self.disk_path, key[:2], f"{key}.html")
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        if self.disk_path:
+            path = self._disk_file(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    html = f.read()
+                # The mtime doubles as the last use for disk eviction.
+                os.utime(path)
+                self._store(key, html)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                return html
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Failed to read render cache entry {key}: {e}")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, html):
+        self._store(key, html)
+
+        if self.disk_path:
+            path = self._disk_file(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(html)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                logger.debug(f"Failed to write render cache entry {key}: {e}")
+            else:
+                self._account_disk(len(html.encode('utf-8')))
+
+    def _disk_entries(self):
+        entries = []
+        for shard in os.scandir(self.disk_path):
+            if shard.is_dir():
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith('.html'):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    # Other processes write to the same directory, so the running total is
+    # only an estimate: crossing disk_max_bytes re-measures the directory and
+    # removes the least recently used files down to 90% of the limit.
+    def _account_disk(self, size):
+        if not self.disk_max_bytes:
+            return
+
+        with self._disk_lock:
+            try:
+                if self._disk_size is None:
+                    self._disk_size = sum(entry[1] for entry in self._disk_entries())
+                self._disk_size += size
+                if self._disk_size <= self.disk_max_bytes:
+                    return
+
+                entries = sorted(self._disk_entries())
+                total = sum(entry[1] for entry in entries)
+                target = self.disk_max_bytes * 0.9
+                for _, entry_size, path in entries:
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= entry_size
+                    self.disk_evictions += 1
+                self._disk_size = total
+            except OSError as e:
+                logger.warning(f"Failed to evict render cache files from {self.disk_path}: {e}")
+
+    def _store(self, key, html):
+        size = len(html.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+
+            self._entries[key] = (html, size)
+            self._size += size
+
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'disk_enabled': bool(self.disk_path),
+                'disk_size_bytes': self._disk_size,
+                'disk_evictions': self.disk_evictions
+            }
+
+render_cache = RenderCache(
+    RENDER_CACHE_CONFIG['max_bytes'],
+    RENDER_CACHE_CONFIG['path'] if RENDER_CACHE_CONFIG['disk'] else None,
+    RENDER_CACHE_CONFIG['disk_max_bytes']
+)
+
+highlight_cache = RenderCache(
+    HIGHLIGHT_CACHE_CONFIG['max_bytes'],
+    HIGHLIGHT_CACHE_CONFIG['path'] if HIGHLIGHT_CACHE_CONFIG['disk'] else None,
+    HIGHLIGHT_CACHE_CONFIG['disk_max_bytes']
+)
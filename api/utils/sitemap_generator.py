@@ -1,12 +1,18 @@
-import os
+import hashlib
+import threading
 from datetime import datetime
 from api.config import SITE_CONFIG
-from api.utils.documents import get_all_documents
-from api.utils.github_utils import get_template_history
+from api.utils.documents import get_all_documents, get_catalog_version, get_catalog_revision
+from api.utils.document_index import document_index
+from api.utils.recent_updates import recent_updates
+
+_sitemap = (None, None, None)
+_sitemap_lock = threading.Lock()
 
 def generate_sitemap():
     base_url = SITE_CONFIG['base_url']
     documents = get_all_documents()
+    modified_times = document_index.modified_times()
     
     sitemap_xml = '<?xml version="1.0" encoding="UTF-8"?>\n'
     sitemap_xml += '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
@@ -18,12 +24,14 @@ def generate_sitemap():
     sitemap_xml += f'    <priority>1.0</priority>\n'
     sitemap_xml += f'  </url>\n'
     
+    # Dates come from the last background history batch. Documents it has
+    # not dated fall back to the file's mtime from the catalog scan, and
+    # virtual folders to today.
     for doc in documents:
-        history = get_template_history(doc['filename'])
-        last_modified = datetime.now().strftime("%Y-%m-%d")
-        
-        if history:
-            last_modified = datetime.strptime(history[0]["date"], "%Y-%m-%d %H:%M").strftime("%Y-%m-%d")
+        last_modified = recent_updates.last_modified(doc['filename'])
+        if last_modified is None and doc['filename'] in modified_times:
+            last_modified = datetime.fromtimestamp(modified_times[doc['filename']] / 1e9)
+        last_modified = (last_modified or datetime.now()).strftime("%Y-%m-%d")
         
         sitemap_xml += f'  <url>\n'
         sitemap_xml += f'    <loc>{base_url}/{doc["filename"]}</loc>\n'
@@ -34,4 +42,18 @@ def generate_sitemap():
     
     sitemap_xml += '</urlset>'
     
-    return sitemap_xml
\ No newline at end of file
+    return sitemap_xml
+
+# The XML only changes with the catalog, a new history batch or the date
+# (the root entry is dated today), so it is rebuilt only when one of those
+# moves. Returns (xml, etag).
+def get_sitemap():
+    global _sitemap
+    key = (get_catalog_version(), get_catalog_revision(), recent_updates.refreshes, datetime.now().date())
+
+    with _sitemap_lock:
+        if _sitemap[0] != key:
+            sitemap_xml = generate_sitemap()
+            etag = hashlib.sha256(sitemap_xml.encode('utf-8')).hexdigest()[:32]
+            _sitemap = (key, sitemap_xml, etag)
+        return _sitemap[1], _sitemap[2]
@@ -0,0 +1,118 @@
+# Usage: python -m benchmarks.analytics_concurrency [processes] [threads] [views per thread]
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import tempfile
+import threading
+import multiprocessing
+from datetime import datetime
+from api.config import ANALYTICS_CONFIG
+from api.utils.analytics import AnalyticsDB
+from api.utils.analytics_backends import MemoryBackend, SQLiteBackend
+
+DOCUMENTS = ['example', 'getting_started', 'reference', 'faq']
+
+def legacy_record_view(conn, document_name):
+    # Previous SQLite path: read the count, add one in Python, write it back.
+    cursor = conn.cursor()
+    cursor.execute('SELECT view_count FROM page_views WHERE document_name = ?', (document_name,))
+    result = cursor.fetchone()
+    current_count = result[0] if result else 0
+    if current_count == 0:
+        cursor.execute('INSERT OR IGNORE INTO page_views (document_name, view_count, last_viewed, created_at) VALUES (?, ?, ?, ?)',
+                       (document_name, 1, datetime.now().isoformat(), datetime.now().isoformat()))
+    else:
+        cursor.execute('UPDATE page_views SET view_count = ?, last_viewed = ? WHERE document_name = ?',
+                       (current_count + 1, datetime.now().isoformat(), document_name))
+    cursor.execute('INSERT INTO view_logs (document_name, ip_hash, user_agent, timestamp) VALUES (?, ?, ?, ?)',
+                   (document_name, 'bench', 'bench', datetime.now().isoformat()))
+
+def open_db(backend):
+    ANALYTICS_CONFIG['write_behind'] = False
+    db = AnalyticsDB(backend)
+    db.init_db()
+    return db
+
+def record_views(db, threads, views):
+    def run(index):
+        for i in range(views):
+            db.record_view(DOCUMENTS[(index + i) % len(DOCUMENTS)], 'bench', 'bench')
+
+    pool = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+def legacy_record_views(backend, threads, views):
+    lock = threading.Lock()
+
+    def run(index):
+        conn = backend._connect()
+        for i in range(views):
+            # The old code only serialized writers within one process.
+            with lock:
+                legacy_record_view(conn, DOCUMENTS[(index + i) % len(DOCUMENTS)])
+        conn.close()
+
+    pool = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+def worker_process(db_path, legacy, threads, views):
+    db = open_db(SQLiteBackend(db_path))
+    if legacy:
+        legacy_record_views(db.backend, threads, views)
+    else:
+        record_views(db, threads, views)
+
+def run(db_path, legacy, processes, threads, views):
+    open_db(SQLiteBackend(db_path))
+    start = time.perf_counter()
+    workers = [multiprocessing.Process(target=worker_process, args=(db_path, legacy, threads, views)) for _ in range(processes)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    conn = sqlite3.connect(db_path)
+    counted = conn.execute('SELECT COALESCE(SUM(view_count), 0) FROM page_views').fetchone()[0]
+    logged = conn.execute('SELECT COUNT(*) FROM view_logs').fetchone()[0]
+    conn.close()
+    return elapsed, counted, logged
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    views = int(sys.argv[3]) if len(sys.argv) > 3 else 250
+    expected = processes * threads * views
+    workdir = tempfile.mkdtemp()
+    try:
+        print(f"{processes} processes x {threads} threads x {views} views = {expected} views on one SQLite file")
+        lost = 0
+        for label, legacy in (('read-then-update', True), ('atomic upsert', False)):
+            elapsed, counted, logged = run(os.path.join(workdir, f"{'legacy' if legacy else 'upsert'}.db"), legacy, processes, threads, views)
+            print(f"  {label:17} {elapsed * 1000:8.1f} ms  {expected / elapsed:8.0f} views/s  counted {counted}, logged {logged}, lost {expected - counted}")
+            if not legacy:
+                lost = expected - counted + expected - logged
+
+        # Same calls with no I/O at all: the cost of the analytics layer itself.
+        db = open_db(MemoryBackend())
+        start = time.perf_counter()
+        record_views(db, threads, processes * views)
+        elapsed = time.perf_counter() - start
+        print(f"  {'memory backend':17} {elapsed * 1000:8.1f} ms  {expected / elapsed:8.0f} views/s  (one process, {threads} threads)")
+
+        if lost:
+            print(f"FAIL: the upsert path lost {lost} writes")
+            sys.exit(1)
+    finally:
+        shutil.rmtree(workdir)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# Usage: python -m benchmarks.cross_reference [documents] [references]
+import re
+import sys
+import time
+import random
+from api.utils.cross_reference import CrossReferenceResolver, REFERENCE_PATTERN, find_references, render_reference
+
+def legacy_process(content, documents):
+    doc_titles = {doc['filename']: doc['title'] for doc in documents}
+
+    def replace_reference(match):
+        ref_text = match.group(1)
+
+        if ref_text in doc_titles:
+            return f'<a href="/{ref_text}" class="cross-reference">{doc_titles[ref_text]}</a>'
+
+        for filename, title in doc_titles.items():
+            if title.lower() == ref_text.lower():
+                return f'<a href="/{filename}" class="cross-reference">{title}</a>'
+
+        return f'<span class="broken-reference">[[{ref_text}]]</span>'
+
+    return re.sub(r'\[\[([^\]]+)\]\]', replace_reference, content)
+
+def indexed_process(content, resolver):
+    links = {
+        ref_text: render_reference(ref_text, resolved)
+        for ref_text, resolved in resolver.resolve_many(find_references(content)).items()
+    }
+    return REFERENCE_PATTERN.sub(lambda match: links[match.group(1)], content)
+
+def make_catalog(count):
+    return [
+        {'filename': f"section_{i % 50}/doc_{i}", 'title': f"Document Number {i}"}
+        for i in range(count)
+    ]
+
+def make_hub_page(documents, references, rng):
+    lines = []
+    for _ in range(references):
+        doc = rng.choice(documents)
+        ref_text = rng.choice([doc['filename'], doc['title'], doc['title'].upper(), 'Missing Page'])
+        lines.append(f"- See [[{ref_text}]] for details.")
+    return '\n'.join(lines)
+
+def time_call(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+def main():
+    document_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    reference_count = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    rng = random.Random(0)
+    documents = make_catalog(document_count)
+    page = make_hub_page(documents, reference_count, rng)
+
+    build_ms = time_call(lambda: CrossReferenceResolver(documents), 5)
+    resolver = CrossReferenceResolver(documents)
+    assert legacy_process(page, documents) == indexed_process(page, resolver)
+
+    legacy_ms = time_call(lambda: legacy_process(page, documents), 3)
+    indexed_ms = time_call(lambda: indexed_process(page, resolver), 20)
+    print(f"{document_count} documents, hub page with {reference_count} references")
+    print(f"  resolver build (once per catalog version): {build_ms:8.3f} ms")
+    print(f"  linear scan per render:                    {legacy_ms:8.3f} ms")
+    print(f"  indexed resolver per render:               {indexed_ms:8.3f} ms ({legacy_ms / indexed_ms:.0f}x)")
+
+if __name__ == '__main__':
+    main()
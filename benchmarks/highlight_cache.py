@@ -0,0 +1,57 @@
+# Usage: python -m benchmarks.highlight_cache [snippets]
+import sys
+import time
+import markdown
+from api.extensions.highlight_cache import HighlightCacheExtension
+from api.utils.markdown import MARKDOWN_EXTENSIONS
+from api.utils.render_cache import RenderCache
+
+SNIPPET = '''def step_{i}(values):
+    total = 0
+    for index, value in enumerate(values):
+        if value % {m} == 0:
+            total += value * index
+    return {{"step": {i}, "total": total}}'''
+
+def make_document(snippets, edit=0):
+    sections = ['# Code-heavy page', '', f'Intro paragraph, revision {edit}.', '']
+    for i in range(snippets):
+        sections += [f'Snippet {i} explanation.', '', '```python', SNIPPET.format(i=i, m=i % 7 + 2), '```', '']
+    return '\n'.join(sections)
+
+def convert(md, document):
+    md.reset()
+    return md.convert(document)
+
+def render(md, document):
+    start = time.perf_counter()
+    convert(md, document)
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    snippets = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    cache = RenderCache(64 * 1024 * 1024)
+    extensions = [HighlightCacheExtension(cache) if isinstance(ext, HighlightCacheExtension) else ext for ext in MARKDOWN_EXTENSIONS]
+    uncached_extensions = [ext for ext in MARKDOWN_EXTENSIONS if not isinstance(ext, HighlightCacheExtension)]
+
+    uncached = markdown.Markdown(extensions=uncached_extensions, output_format='html5')
+    cached = markdown.Markdown(extensions=extensions, output_format='html5')
+
+    original = make_document(snippets)
+    edited = make_document(snippets, edit=1)
+    assert convert(uncached, edited) == convert(cached, edited) == convert(cached, edited)
+
+    cache.clear()
+    cache.misses = cache.hits = 0
+    uncached_ms = render(uncached, edited)
+    cold_ms = render(cached, original)
+    misses_before = cache.misses
+    warm_ms = render(cached, edited)
+
+    print(f"Page with {snippets} code blocks")
+    print(f"  without highlight cache:       {uncached_ms:8.1f} ms")
+    print(f"  cold cache:                    {cold_ms:8.1f} ms")
+    print(f"  after editing one paragraph:   {warm_ms:8.1f} ms ({cache.misses - misses_before} blocks re-highlighted)")
+
+if __name__ == '__main__':
+    main()
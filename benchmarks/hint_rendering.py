@@ -0,0 +1,81 @@
+# Usage: python -m benchmarks.hint_rendering [hints] [iterations]
+import sys
+import time
+import markdown
+from markdown.extensions import Extension
+from api.extensions.components import register_component
+from api.extensions.hint import HintBlock, HintExtension, HINT_ICONS, HINT_END
+from api.utils.markdown import MARKDOWN_EXTENSIONS, create_markdown_parser
+
+class LegacyHintBlock(HintBlock):
+    # Previous behaviour: every hint body went through its own markdown parser.
+    def _create_hint(self, hint_type, hint_title, body, index, icon_type):
+        processed_content = markdown.markdown('\n'.join(body), extensions=['fenced_code', 'codehilite'], output_format='html5')
+        display_title = hint_title if hint_title else hint_type.title()
+        return f'''<div class="mdoc-hint mdoc-hint-{hint_type}" id="hint-{index}">
+    <div class="hint-header">
+        <div class="hint-icon">{HINT_ICONS[icon_type]}</div>
+        <h4 class="hint-title">{display_title}</h4>
+    </div>
+    <div class="hint-content">
+        {processed_content}
+    </div>
+</div>'''
+
+class LegacyHintExtension(Extension):
+    def extendMarkdown(self, md):
+        register_component(md, LegacyHintBlock(), 170)
+
+def make_document(hints):
+    sections = ['# Hint-heavy tutorial', '']
+    for i in range(hints):
+        sections += [
+            f'## Step {i}',
+            '',
+            f'Explanation for step {i} with some *emphasis* and `inline code`.',
+            '',
+            f'```hint {["info", "tip", "warning", "note"][i % 4]} Step {i} remark',
+            'Remember to **save** your work.',
+            '',
+            '- first point',
+            '- second point',
+        ]
+        if i % 4 == 0:
+            sections += ['', '```python', f'step_{i} = run()', '```', '', 'Check the result.']
+        sections += ['```', '']
+    return '\n'.join(sections)
+
+def time_call(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+def main():
+    hints = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    document = make_document(hints)
+
+    legacy_extensions = [ext for ext in MARKDOWN_EXTENSIONS if not isinstance(ext, HintExtension)] + [LegacyHintExtension()]
+    legacy = markdown.Markdown(extensions=legacy_extensions, output_format='html5')
+    current = create_markdown_parser()
+
+    def render(md):
+        md.reset()
+        md.convert(document)
+
+    render(legacy)
+    html = current.reset().convert(document)
+    # Hints holding a fenced code block must close around it, not inside it.
+    if HINT_END in html or html.count('class="mdoc-hint ') != hints or html.count('Check the result.') != (hints + 3) // 4:
+        print("FAIL: hints with fenced code blocks rendered incorrectly")
+        sys.exit(1)
+    legacy_ms = time_call(lambda: render(legacy), iterations)
+    current_ms = time_call(lambda: render(current), iterations)
+
+    print(f"Document with {hints} hints ({iterations} iterations)")
+    print(f"  parser per hint body: {legacy_ms:8.3f} ms")
+    print(f"  single parse:         {current_ms:8.3f} ms ({(1 - current_ms / legacy_ms) * 100:.1f}% faster)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# Usage: python -m benchmarks.html_postprocess [iterations]
+import os
+import re
+import sys
+import time
+import bleach
+from api.config import DOCS_DIR
+from api.utils.markdown import ALLOWED_TAGS, ALLOWED_ATTRIBUTES, ALLOWED_PROTOCOLS, create_markdown_parser, html_postprocessor
+
+# The post-markdown chain as it ran before the fused pass.
+def legacy_add_ids_to_headings(html_content):
+    def add_id(match):
+        tag, level, attrs, text = match.group(1), match.group(2), match.group(3) or "", match.group(4)
+        if 'id=' not in attrs:
+            clean_text = re.sub(r'<[^>]+>', '', text).strip()
+            heading_id = re.sub(r'[^\w\s-]', '', clean_text.lower())
+            heading_id = re.sub(r'[-\s]+', '-', heading_id).strip('-')
+            attrs += f' id="{heading_id}"'
+        return f'<{tag}{level}{attrs}>{text}</{tag}{level}>'
+
+    return re.sub(r'<(h)([1-6])([^>]*)>(.*?)</h[1-6]>', add_id, html_content, flags=re.DOTALL)
+
+def legacy_enhance_links(html_content):
+    def enhance_external_link(match):
+        href, rest_of_tag, content = match.group(1), match.group(2), match.group(3)
+        if href.startswith(('http://', 'https://')):
+            if 'target=' not in rest_of_tag:
+                rest_of_tag += ' target="_blank"'
+            if 'rel=' not in rest_of_tag:
+                rest_of_tag += ' rel="noopener noreferrer"'
+            if 'class=' not in rest_of_tag:
+                rest_of_tag += ' class="external-link-button"'
+        return f'<a href="{href}"{rest_of_tag}>{content}</a>'
+
+    return re.sub(r'<a href="([^"]*)"([^>]*)>(.*?)</a>', enhance_external_link, html_content, flags=re.DOTALL)
+
+def legacy_remove_first_h1(html_content):
+    match = re.compile(r'<h1[^>]*>.*?</h1>', re.DOTALL).search(html_content)
+    if match:
+        return html_content.replace(match.group(0), '', 1)
+    return html_content
+
+def legacy_chain(html_content):
+    html_content = legacy_add_ids_to_headings(html_content)
+    html_content = legacy_enhance_links(html_content)
+    html_content = bleach.clean(
+        html_content,
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        protocols=ALLOWED_PROTOCOLS,
+        strip=False,
+        strip_comments=False
+    )
+    return legacy_remove_first_h1(html_content)
+
+def fused(html_content):
+    return html_postprocessor.process(html_content, drop_first_h1=True)
+
+def time_per_call(func, arg, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(arg)
+    return (time.perf_counter() - start) / iterations * 1000
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    md = create_markdown_parser()
+    pages = []
+
+    for root, _, files in os.walk(DOCS_DIR):
+        for name in sorted(files):
+            if name.endswith('.md'):
+                with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                    pages.append((os.path.relpath(os.path.join(root, name), DOCS_DIR), md.convert(f.read())))
+                md.reset()
+
+    combined = '\n'.join(html for _, html in pages)
+    pages.append(('all docs x20 (synthetic)', combined * 20))
+
+    print(f"{'page':<45} {'size':>9} {'legacy':>11} {'fused':>11} {'speedup':>8} {'same':>5}")
+    for name, html in sorted(pages):
+        before = time_per_call(legacy_chain, html, iterations)
+        after = time_per_call(fused, html, iterations)
+        same = legacy_chain(html) == fused(html)
+        print(f"{name:<45} {len(html):>8}B {before:>9.2f}ms {after:>9.2f}ms {before / after:>7.1f}x {str(same):>5}")
+
+if __name__ == '__main__':
+    main()
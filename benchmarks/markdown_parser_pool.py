@@ -0,0 +1,68 @@
+# Usage: python -m benchmarks.markdown_parser_pool [iterations]
+#
+# Measures what a parser pool could save: building a markdown.Markdown per
+# render against resetting one reused instance, next to the whole render-cache
+# miss that either one sits in (cross references, conversion, post-processing).
+import os
+import sys
+import time
+from api.config import DOCS_DIR
+from api.utils.markdown import create_markdown_parser, convert_markdown_to_html
+from api.utils.render_cache import render_cache, highlight_cache
+
+def load_documents():
+    documents = []
+    for root, _, files in os.walk(DOCS_DIR):
+        for name in sorted(files):
+            if name.endswith('.md'):
+                path = os.path.join(root, name)
+                with open(path, 'r', encoding='utf-8') as f:
+                    documents.append((os.path.relpath(path, DOCS_DIR), f.read()))
+    return sorted(documents)
+
+def time_per_call(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    documents = load_documents()
+    reused = create_markdown_parser()
+    # Every miss has to render from scratch, highlighting included.
+    render_cache.disk_path = highlight_cache.disk_path = None
+
+    setup_ms = time_per_call(create_markdown_parser, iterations)
+    print(f"Parser construction: {setup_ms:.3f} ms per instance ({iterations} iterations)")
+    print()
+    print(f"{'document':<50} {'fresh':>10} {'reused':>10} {'miss':>10} {'share':>7}")
+
+    total_fresh = total_reused = total_miss = 0.0
+    for name, content in documents:
+        def fresh():
+            create_markdown_parser().convert(content)
+
+        def reuse():
+            reused.reset()
+            reused.convert(content)
+
+        def miss():
+            render_cache.clear()
+            highlight_cache.clear()
+            convert_markdown_to_html(content, drop_first_h1=True)
+
+        reuse()
+        fresh_ms = time_per_call(fresh, iterations)
+        reused_ms = time_per_call(reuse, iterations)
+        miss_ms = time_per_call(miss, iterations)
+        total_fresh += fresh_ms
+        total_reused += reused_ms
+        total_miss += miss_ms
+        # share: what reusing the parser would take off a render-cache miss.
+        print(f"{name:<50} {fresh_ms:>8.3f}ms {reused_ms:>8.3f}ms {miss_ms:>8.3f}ms {(fresh_ms - reused_ms) / miss_ms * 100:>6.1f}%")
+
+    print(f"{'total':<50} {total_fresh:>8.3f}ms {total_reused:>8.3f}ms {total_miss:>8.3f}ms {(total_fresh - total_reused) / total_miss * 100:>6.1f}%")
+
+if __name__ == '__main__':
+    main()